@@ -21,21 +21,24 @@
 
 from sklearn.decomposition import PCA
 import numpy as np
-from sklearn import svm
 from scipy.ndimage import uniform_filter1d
 from scipy.fft import rfft
+from numpy.lib.stride_tricks import sliding_window_view
+from concurrent.futures import ThreadPoolExecutor
+from .detectors import make_detector
 
 "General Parameters"
 uf = 400                # Uniform Filter Size for detrending
 detrend = False         # Detrend the data
 use_fft = False         # Use FFT for feature extraction
 save_segments = False   # Save the segment indices for visualization
+detector = "ocsvm"      # Novelty detector backend (see detectors.DETECTORS)
 
 "Variables for Anomaly Detection"
 events = {}             # Dictionary to store detected events
 
 # Detection of anomalous points
-def anomaly_detection(input_data, sampling_rate_hz, window_length_sec, nu_value):
+def anomaly_detection(input_data, sampling_rate_hz, window_length_sec, nu_value, stride_sec=None):
     """
     Detects anomalous segments in input_data using PCA and One-Class SVM.
 
@@ -44,6 +47,9 @@ def anomaly_detection(input_data, sampling_rate_hz, window_length_sec, nu_value)
     - sampling_rate_hz: Sampling rate in Hz.
     - window_length_sec: Length of each window in seconds.
     - nu_value: Parameter for One-Class SVM (nu).
+    - stride_sec: Step between window starts in seconds (default: window_length_sec,
+      i.e. non-overlapping windows). With overlapping windows each sample counts
+      the anomalous windows covering it.
     - use_fft: Boolean flag to apply rFFT on each segment.
 
     Returns:
@@ -56,12 +62,85 @@ def anomaly_detection(input_data, sampling_rate_hz, window_length_sec, nu_value)
         input_data, _ = detrend(input_data, uf)
 
     window_length = int(window_length_sec * sampling_rate_hz)
-    segments = [input_data[i:i+window_length] for i in range(0,int(window_length * np.floor(len(input_data)/window_length)),window_length)] 
-    # Ensure that the input_data is divisible by window_length
-    
+    stride = window_length if stride_sec is None else int(stride_sec * sampling_rate_hz)
+    anomaly_flag, starts, anomaly_scores = _detect_scale(input_data, window_length, stride, nu_value)
+
+    if(save_segments):
+        _save_events(window_length_sec, window_length, starts, anomaly_scores)
+
+    return anomaly_flag
+
+# Detection of anomalous points over several window lengths
+def multiscale_anomaly_detection(input_data, sampling_rate_hz, window_lengths_sec, nu_value,
+                                 overlap=0.0, n_jobs=1):
+    """
+    Runs RUDE at several window lengths in one pass and fuses the results.
+
+    The signal is detrended once and every scale segments views of the same
+    buffer; the per-scale PCA and One-Class SVM fits run in parallel threads.
+
+    Parameters:
+    - input_data: 1D numpy array of the signal.
+    - sampling_rate_hz: Sampling rate in Hz.
+    - window_lengths_sec: Iterable of window lengths in seconds.
+    - nu_value: Parameter for One-Class SVM (nu).
+    - overlap: Fraction of each window shared with the next one (0 <= overlap < 1).
+    - n_jobs: Number of worker threads fitting scales concurrently (-1 for all cores).
+
+    Returns:
+    - fused_score: Per-sample fraction of scales flagging the sample, in [0, 1].
+    - scale_flags: Array of shape (n_scales, n_samples) with the per-scale flags,
+      normalized by the number of windows covering each sample.
+    """
+    if not 0 <= overlap < 1:
+        raise ValueError("overlap must be in [0, 1).")
+    window_lengths_sec = list(window_lengths_sec)
+
+    # Shared detrending
+    input_data = np.asarray(input_data, dtype=float)
+    if detrend:
+        input_data, _ = detrend(input_data, uf)
+
+    def run(window_length_sec):
+        window_length = int(window_length_sec * sampling_rate_hz)
+        stride = max(1, int(round(window_length * (1 - overlap))))
+        anomaly_flag, starts, anomaly_scores = _detect_scale(input_data, window_length, stride, nu_value)
+        # Normalize overlapping windows to a per-sample fraction
+        coverage = expand_flags(np.ones(len(starts)), len(input_data), window_length, stride)
+        np.divide(anomaly_flag, coverage, out=anomaly_flag, where=coverage > 0)
+        return window_length, starts, anomaly_flag, anomaly_scores
+
+    if n_jobs == 1 or len(window_lengths_sec) < 2:
+        results = [run(w) for w in window_lengths_sec]
+    else:
+        with ThreadPoolExecutor(max_workers=n_jobs if n_jobs > 0 else None) as pool:
+            results = list(pool.map(run, window_lengths_sec))
+
+    scale_flags = np.zeros((len(window_lengths_sec), len(input_data)))
+    for i, (window_length, starts, anomaly_flag, anomaly_scores) in enumerate(results):
+        scale_flags[i] = anomaly_flag
+        if(save_segments):
+            _save_events(window_lengths_sec[i], window_length, starts, anomaly_scores)
+
+    if not window_lengths_sec:
+        return np.zeros(len(input_data)), scale_flags
+    return scale_flags.mean(axis=0), scale_flags
+
+# Single-scale detection core
+def _detect_scale(input_data, window_length, stride, nu_value):
+    """
+    Segments the signal, reduces it with PCA and clusters it with a One-Class SVM.
+
+    Returns:
+    - anomaly_flag: Per-sample count of anomalous windows.
+    - starts: Start index of each window.
+    - anomaly_scores: Decision function per window (the lower, the more anomalous).
+    """
+    segments, starts = segment_windows(input_data, window_length, stride)
+
     # Optional FFT Transformation
     if use_fft:
-        # Apply rFFT to each segment and take the magnitude
+        # Apply rFFT to all segments at once and take the magnitude
         segments_fft = np.abs(rfft(segments, axis=1))
         # Optionally, you can normalize or scale the FFT features here
         features = segments_fft
@@ -72,50 +151,85 @@ def anomaly_detection(input_data, sampling_rate_hz, window_length_sec, nu_value)
     pca = PCA(n_components=2)
     principal_components = pca.fit_transform(features)
 
-    # Clustering via One-Class SVM
-    ocsvm = svm.OneClassSVM(nu=nu_value, kernel='rbf', gamma='scale')
-    ocsvm.fit(principal_components)
-    
-
+    # Clustering via One-Class SVM (or the configured detector backend)
+    model = make_detector(detector, nu_value)
+    model.fit(principal_components)
 
     # Predict anomalies: 1 for normal, -1 for anomalies
-    y_pred = ocsvm.predict(principal_components)
-    
-    # Floor predictions at 0 for easy summation analysis
-    y_pred = np.where(y_pred < 0, 0, 1)
-   
+    y_pred = model.predict(principal_components)
+    anomaly_scores = model.decision_function(principal_components)
+
     # Invert to time series
-    anomaly_flag = np.zeros(len(input_data))
-    for idx, pred in enumerate(y_pred):
-        if pred == 0:
-            start = idx * window_length
-            stop = (idx + 1) * window_length
-            anomaly_flag[start:stop] += 1
+    anomaly_flag = expand_flags(y_pred < 0, len(input_data), window_length, stride)
+    return anomaly_flag, starts, anomaly_scores
 
-    if(save_segments):
-        # Obtain anomaly scores (the lower, the more anomalous)
-        anomaly_scores = ocsvm.decision_function(principal_components)
-        
-        # Create an ordered list of anomalies based on anomaly_scores
-        # Since lower scores are more anomalous, we sort ascending
-        ordered_indices = np.argsort(anomaly_scores)
-        
-        ordered_anomalies = []
-        for idx in ordered_indices:
-            score = anomaly_scores[idx]
-            start = idx * window_length
-            stop = (idx + 1) * window_length
-            ordered_anomalies.append({
-                'segment_index': idx,
-                'start_index': start,
-                'stop_index': stop,
-                'anomaly_score': score
-            })
-        
-        # Store the detected events by window length
-        events[window_length_sec] = ordered_anomalies
+# Storage of ordered events
+def _save_events(window_length_sec, window_length, starts, anomaly_scores):
+    """
+    Stores the windows ordered by anomaly severity in events[window_length_sec].
+    """
+    # Since lower scores are more anomalous, we sort ascending
+    ordered_indices = np.argsort(anomaly_scores)
 
-    return anomaly_flag
+    ordered_anomalies = [{
+            'segment_index': idx,
+            'start_index': start,
+            'stop_index': start + window_length,
+            'anomaly_score': score
+        } for idx, start, score in zip(ordered_indices, starts[ordered_indices], anomaly_scores[ordered_indices])]
+
+    # Store the detected events by window length
+    events[window_length_sec] = ordered_anomalies
+
+# Zero-copy window segmentation
+def segment_windows(input_data, window_length, stride=None):
+    """
+    Splits the signal into windows without copying.
+
+    Parameters:
+    - input_data: 1D numpy array of the signal.
+    - window_length: Window length in samples.
+    - stride: Step between window starts in samples (default: window_length).
+
+    Returns:
+    - segments: Read-only strided view of shape (n_windows, window_length); only
+      complete windows are kept.
+    - starts: Start index of each window.
+    """
+    input_data = np.asarray(input_data)
+    if stride is None:
+        stride = window_length
+    if len(input_data) < window_length:
+        return np.empty((0, window_length)), np.empty(0, dtype=int)
+    segments = sliding_window_view(input_data, window_length)[::stride]
+    starts = np.arange(segments.shape[0]) * stride
+    return segments, starts
+
+# Expansion of window flags to samples
+def expand_flags(window_flags, n_samples, window_length, stride=None):
+    """
+    Expands per-window flags to a per-sample flag series.
+
+    Parameters:
+    - window_flags: 1D array with one value per window.
+    - n_samples: Length of the output series.
+    - window_length: Window length in samples.
+    - stride: Step between window starts in samples (default: window_length).
+
+    Returns:
+    - anomaly_flag: Sum of the flags of all windows covering each sample.
+    """
+    window_flags = np.asarray(window_flags, dtype=float)
+    if stride is None or stride == window_length:
+        anomaly_flag = np.zeros(n_samples)
+        repeated = np.repeat(window_flags, window_length)
+        anomaly_flag[:len(repeated)] = repeated
+        return anomaly_flag
+    # Overlapping windows: add at each window start, subtract after its end
+    starts = np.arange(len(window_flags)) * stride
+    edges = np.bincount(starts, window_flags, minlength=n_samples + 1)
+    edges -= np.bincount(starts + window_length, window_flags, minlength=n_samples + 1)
+    return np.cumsum(edges)[:n_samples]
 
 # Detrending by uniform filter
 def detrend(signal, filt_length):
@@ -18,49 +18,63 @@
 # ║  of RUDER described in forthcoming manuscript.                               ║
 # ╚══════════════════════════════════════════════════════════════════════════════╝
 
+import asyncio
+import contextlib
+import itertools
+import socket
 import numpy as np
-from sklearn import svm
+from .detectors import make_detector
 
 class _RecursivePCA():
     # Methodology adapted from 'Process Monitoring Approach using Fast Moving Window PCA'
     # by Wang et al., 2005 (Industrial & Engineering Chemistry Research)
+    # Independent models for several channels are stacked along leading axes, e.g.
+    # initial_data of shape (n_channels, n_windows, window_length), and updated together.
     def __init__(self):
         self.initialized = False
         self.correlation_matrix = None
-        self.standard_deviation_matrix = None
         self.mean_matrix = None
         self.oldest_sample = None
         self.initialization_length = None
         self.standard_deviation_vector = None
+
+    @property
+    def standard_deviation_matrix(self):
+        # sigma is diagonal, so only its diagonal is stored and scaling is done elementwise
+        if self.standard_deviation_vector is None:
+            return None
+        std_k = self.standard_deviation_vector
+        return std_k[..., :, None] * np.eye(std_k.shape[-1])
     
     def initialize_model(self, initial_data):
-        # compute mean and standard dev matrices
-        b_k = np.mean(initial_data, axis=0)
-        std_k = np.std(initial_data, axis=0)
-        sigma_k = std_k * np.eye(len(b_k))
+        # compute mean and standard dev vectors
+        initial_data = np.asarray(initial_data, dtype=float)
+        b_k = np.mean(initial_data, axis=-2)
+        std_k = np.std(initial_data, axis=-2)
 
         # scale initial data to zero mean and unit std
-        scaled_data = (initial_data - b_k) / np.std(initial_data, axis=0)
+        scaled_data = (initial_data - b_k[..., None, :]) / std_k[..., None, :]
 
         # compute correlation matrix
-        r_k = (1 / (np.shape(scaled_data)[0] - 1)) * scaled_data.transpose() @ scaled_data
+        r_k = (1 / (np.shape(scaled_data)[-2] - 1)) * np.swapaxes(scaled_data, -1, -2) @ scaled_data
 
         self.initialized = True
-        self.standard_deviation_matrix = sigma_k
         self.correlation_matrix = r_k
         self.mean_matrix = b_k
-        self.initialization_length = np.shape(initial_data)[0]
+        self.initialization_length = np.shape(initial_data)[-2]
         self.standard_deviation_vector = std_k
 
     def iterate_model(self, new_sample, old_sample):
         if self.initialized == False:
             raise Exception('Model is not initialized. Please use _RecursivePCA.initialize_model() to initialize before iterating the model.')
         else:
-            # load in some variables for notational convenience
+            # load in some variables for notational convenience; products with the
+            # inverse of the diagonal sigma matrices are elementwise divisions by std
+            new_sample = np.asarray(new_sample, dtype=float)
+            old_sample = np.asarray(old_sample, dtype=float)
             initialization_length = self.initialization_length
             b_k = self.mean_matrix
             r_k = self.correlation_matrix
-            sigma_k = self.standard_deviation_matrix
             std_k = self.standard_deviation_vector
 
             # step one: remove oldest sample
@@ -70,10 +84,11 @@ class _RecursivePCA():
             delta_b_hat = b_k - b_hat
 
             # scale discarded sample
-            x_k = np.linalg.inv(sigma_k) @ (old_sample - b_k)
+            x_k = (old_sample - b_k) / std_k
 
             # bridge over matrix 1 and 2
-            r_star = r_k - np.linalg.inv(sigma_k) @ np.outer(delta_b_hat, delta_b_hat) @ np.linalg.inv(sigma_k) - (1 / (initialization_length - 1)) * x_k @ x_k.transpose()
+            scaled_delta_b_hat = delta_b_hat / std_k
+            r_star = r_k - _outer(scaled_delta_b_hat, scaled_delta_b_hat) - (1 / (initialization_length - 1)) * _dot(x_k, x_k)
 
             # step two: add new sample
             b_kp = (1 / initialization_length) * ((initialization_length - 1) * b_hat + new_sample)
@@ -83,17 +98,16 @@ class _RecursivePCA():
 
             # standard deviation of matrix 3
             std_kp = std_k + delta_b_kp**2 - delta_b_hat**2 + ((new_sample - b_kp)**2 - (old_sample - b_k)**2) / (initialization_length - 1)
-            sigma_kp = std_kp * np.eye(len(b_kp))
 
             # scale the new sample
-            x_kp = np.linalg.inv(sigma_kp) @ (new_sample - b_kp)
+            x_kp = (new_sample - b_kp) / std_kp
 
             # correlation matrix of matrix 3
-            r_kp = np.linalg.inv(sigma_kp) @ sigma_k @ r_star @ sigma_k @ np.linalg.inv(sigma_kp) + np.linalg.inv(sigma_kp) @ delta_b_kp @ delta_b_kp.transpose() + (1 / (initialization_length - 1)) * x_kp @ x_kp.transpose()
+            ratio = std_k / std_kp
+            r_kp = r_star * _outer(ratio, ratio) + _dot(delta_b_kp / std_kp, delta_b_kp) + (1 / (initialization_length - 1)) * _dot(x_kp, x_kp)
 
             self.correlation_matrix = r_kp
             self.mean_matrix = b_kp
-            self.standard_deviation_matrix = sigma_kp
             self.standard_deviation_vector = std_kp
 
     def compute_pcs(self, n_components=2):
@@ -101,143 +115,459 @@ class _RecursivePCA():
         # which our correlation matrix has to be
         eigenvalues, eigenvectors = np.linalg.eigh(self.correlation_matrix)
         # need to flip since they're sorted in ascending order based on the eigenvalues
-        principal_components = np.fliplr(eigenvectors)
+        principal_components = eigenvectors[..., ::-1]
+
+        return principal_components[..., :n_components] # only output the desired number of components
 
-        return principal_components[:,:n_components] # only output the desired number of components
+def _outer(a, b):
+    # outer product over the last axis, broadcast over stacked channels
+    return a[..., :, None] * b[..., None, :]
+
+def _dot(a, b):
+    # inner product over the last axis, shaped to broadcast against stacked matrices
+    if a.ndim == 1:
+        return a @ b
+    return np.einsum('...i,...i->...', a, b)[..., None, None]
 
 class _TrajectoryMatrix():
+    # Rows are kept in a ring buffer: row replacement is O(window_length) and the
+    # oldest row sits at index `head` of the storage array. Channels may be stacked
+    # along leading axes, with rows on axis -2.
     def __init__(self, x=None):
-        self.x = x
+        self.head = 0
+        self.buffer = None if x is None else np.array(x, dtype=float)
+
+    @property
+    def x(self):
+        # chronologically ordered copy of the trajectory matrix
+        if self.buffer is None:
+            return None
+        return np.roll(self.buffer, -self.head, axis=-2)
+
+    @x.setter
+    def x(self, value):
+        self.head = 0
+        self.buffer = None if value is None else np.array(value, dtype=float)
     
     def update_single_point(self, new_point):
-        # This expects columns of time series data with length rows
-        n_rows = np.shape(self.x)[0]
-        n_cols = np.shape(self.x)[1]
-
-        # make temp copy of x
-        temp_x = np.copy(self.x)
-
-        for row in range(n_rows-1):
-            temp_x[row,:] = self.x[row+1,:]
-        for col in range(n_cols-1):
-            temp_x[n_rows-1,col] = self.x[0,col+1]
-        temp_x[n_rows-1,n_cols-1] = new_point
-
-        self.x = temp_x
+        # Rows move up by one and the new last row is the old first row shifted
+        # left by one sample with new_point appended; in the ring buffer that is
+        # the oldest row rewritten in place before it becomes the newest
+        row = self.buffer[..., self.head, :]
+        row[..., :-1] = row[..., 1:]
+        row[..., -1] = new_point
+        self.head = (self.head + 1) % self.buffer.shape[-2]
 
     def update_row(self, new_row):
-        temp_x = np.copy(self.x)
-        old_row = temp_x[0,:]
-        temp_x = np.vstack([temp_x, new_row])
-
-        self.x = temp_x[1:,:]
+        old_row = self.buffer[..., self.head, :].copy()
+        self.buffer[..., self.head, :] = new_row
+        self.head = (self.head + 1) % self.buffer.shape[-2]
 
         return old_row
 
     def from_timeseries(self, time_series, window_length=66):
-        trajectory_matrix = [time_series[i:i+window_length] \
-                             for i in range(0,int(window_length * np.floor(len(time_series)/window_length)),window_length)] 
-                            # The floor math ensures that there are no 'short' intervals < interval_length
-        self.x = np.array(trajectory_matrix)
-    
+        time_series = np.asarray(time_series, dtype=float)
+        n_windows = time_series.shape[-1] // window_length
+        # The floor math ensures that there are no 'short' intervals < interval_length
+        self.x = time_series[..., :n_windows * window_length].reshape(time_series.shape[:-1] + (n_windows, window_length))
+
+class RUDEREngine():
+    '''
+    Streaming RUDER state: ring-buffer trajectory matrix, recursive PCA model, detector
+    and a circular per-window flag accumulator. The per-window cost depends only on
+    window_length and initialization_length, not on how much data has been processed.
+    Several channels (e.g. NEC components of several satellites) share one engine: their
+    trajectory matrices and PCA states are stacked and updated together, with one
+    detector per channel.
+
+    Inputs:
+        window_length: Defines the length of the window used to construct the reduced trajectory matrix
+        initialization_length: Defines the number of windows used in the computation of the PCA model
+        nu: Nu value to use in OC-SVM
+        detector: Novelty detector backend name (see detectors.make_detector); a detector object is
+            only accepted for a single channel
+        incremental: Update detectors with partial_fit on the newest window (None: whenever the backend
+            supports it) or refit them on all current windows (False)
+        refit_similarity: Incremental detectors are refit on the current windows when the principal
+            subspace rotates so far that the cosine of its largest principal angle drops below this value,
+            since earlier updates were made in a frame the new windows no longer share
+    '''
+    def __init__(self, window_length, initialization_length, nu=0.1, detector='ocsvm', incremental=None,
+                 refit_similarity=0.9):
+        self.window_length = window_length
+        self.initialization_length = initialization_length
+        self.nu = nu
+        self.detector = detector
+        self.use_incremental = incremental
+        self.refit_similarity = refit_similarity
+        self.traj = _TrajectoryMatrix()
+        self.rpca_model = _RecursivePCA()
+        self.models = []
+        self.incremental = False
+        self.principal_components = None
+        self.subspace_similarity = None
+        self.multichannel = False
+        self.counts = np.zeros((1, initialization_length))
+        self.n_updates = 0
+
+    def initialize(self, data):
+        '''
+        Initializes the model from initialization_length windows of samples, shape (n_samples,)
+        for one channel or (n_samples, n_channels).
+        '''
+        # step one: build the (n_channels, n_windows, window_length) trajectory matrix and perform PCA initialization
+        data = np.asarray(data, dtype=float)
+        self.multichannel = data.ndim > 1
+        self.traj.from_timeseries(np.atleast_2d(data.T), window_length=self.window_length)
+        self.rpca_model.initialize_model(self.traj.buffer)
+        n_channels, n_windows = self.traj.buffer.shape[:2]
+        self.counts = np.zeros((n_channels, n_windows))
+        self.n_updates = 0
+
+        # step two: generate first set of principal component projections and classify with ocsvm
+        if n_channels > 1 and not isinstance(self.detector, str):
+            raise ValueError('A detector object can only be shared by a single channel; pass a backend name.')
+        self.principal_components = None
+        if self.detector == 'mahalanobis' and self.use_incremental is not False:
+            # forget at the rate windows leave the trajectory matrix, so the streaming
+            # statistics describe the same windows a refit would use
+            kwargs = {'forgetting': 1.0 - 1.0 / n_windows}
+        else:
+            kwargs = {}
+        self.models = [make_detector(self.detector, self.nu, **kwargs) for c in range(n_channels)]
+        supported = hasattr(self.models[0], 'partial_fit')
+        self.incremental = supported if self.use_incremental is None else (self.use_incremental and supported)
+        fit_data = self._project()
+        for model, channel_data in zip(self.models, fit_data):
+            model.fit(channel_data)
+        self._accumulate(fit_data)
+
+    def update(self, new_data):
+        '''
+        Adds one window of samples, shape (window_length,) or (window_length, n_channels), and
+        returns the finalized flags of the window that leaves the trajectory matrix, in the same shape.
+        '''
+        new_data = np.atleast_2d(np.asarray(new_data, dtype=float).T)
+        head = self.traj.head
+        finalized = np.repeat(self.counts[None, :, head], self.window_length, axis=0)
+        self.counts[:, head] = 0
+
+        old_data = self.traj.update_row(new_data)
+        self.rpca_model.iterate_model(new_data, old_data)
+        fit_data = self._project()
+
+        for c, (model, channel_data) in enumerate(zip(self.models, fit_data)):
+            if self.incremental and self.subspace_similarity[c] >= self.refit_similarity:
+                model.partial_fit(channel_data[-1:]) # newest window
+            else:
+                model.fit(channel_data)
+        self._accumulate(fit_data)
+        self.n_updates += 1
+
+        return finalized if self.multichannel else finalized[:, 0]
+
+    def pending(self):
+        # flags of the windows still inside the trajectory matrix, in chronological order
+        pending = np.repeat(np.roll(self.counts, -self.traj.head, axis=1), self.window_length, axis=1).T
+        return pending if self.multichannel else pending[:, 0]
+
+    @property
+    def model(self):
+        # detector of a single-channel engine
+        return self.models[0] if len(self.models) == 1 else None
+
+    def _project(self):
+        # centering the data here ensures that the values output are the same as those
+        # output by the sklearn PCA algorithm; however, there's still ambiguity in the 
+        # sign of the eigenvectors output (i.e., v = -v). Only the small (n_channels, n_windows, 2)
+        # projection is reordered chronologically, since the detector fit depends on row order.
+        principal_components = self.rpca_model.compute_pcs(n_components=2)
+        if self.incremental:
+            # incrementally updated detectors need projections in a consistent frame
+            principal_components, self.subspace_similarity = _align_components(principal_components, self.principal_components)
+            self.principal_components = principal_components
+        centered = self.traj.buffer - self.rpca_model.mean_matrix[:, None, :]
+        return np.roll(centered @ principal_components, -self.traj.head, axis=1)
+
+    def _accumulate(self, fit_data):
+        # flags are constant over a window, so one counter per channel and ring-buffer slot suffices
+        for c, (model, channel_data) in enumerate(zip(self.models, fit_data)):
+            self.counts[c] += np.roll(model.predict(channel_data) != 1, self.traj.head)
+
+def _align_components(principal_components, previous):
+    '''
+    Expresses the (n_channels, window_length, k) principal components in the frame closest to the
+    previous basis. eigh returns them with arbitrary sign, swaps their order when eigenvalues cross
+    and rotates nearly degenerate pairs freely; the orthogonal Procrustes rotation of the new basis
+    onto the previous one undoes all three while spanning the same principal subspace.
+
+    Returns the aligned components and, per channel, the smallest cosine of the principal angles
+    between the two subspaces (1 when the subspace did not move).
+    '''
+    if previous is None:
+        return principal_components, np.ones(principal_components.shape[0])
+    overlap = np.swapaxes(principal_components, -1, -2) @ previous  # (n_channels, k, k)
+    U, cosines, Vt = np.linalg.svd(overlap)
+    return principal_components @ (U @ Vt), cosines.min(axis=-1)
+
 class DataStream():
-    def __init__(self, filename=None):
+    # Text stream: rows are observations, columns are comma-separated features
+    def __init__(self, filename=None, header_lines=1):
         self.filename = filename
+        self.header_lines = header_lines
     def stream(self, filename=None):
         # yield a new data sample from a file
         if filename:
             self.filename = filename
         for row in open(filename, 'r'):
             yield row
-
-def RUDER(window_length, initialization_length, data_stream: DataStream, col_n, filename, nu=0.1):
+    def blocks(self, block_size, col_n):
+        # yield (block_size,) arrays of column col_n (or (block_size, k) for a list of columns);
+        # each block is parsed in one call and a trailing partial block is dropped
+        with open(self.filename, 'r') as f:
+            for i in range(self.header_lines):
+                next(f, None)
+            while True:
+                lines = list(itertools.islice(f, block_size))
+                if len(lines) < block_size:
+                    return
+                try:
+                    block = np.loadtxt(lines, delimiter=',', usecols=col_n, ndmin=1 if np.isscalar(col_n) else 2)
+                except (ValueError, IndexError):
+                    # malformed trailing lines end the stream
+                    return
+                if block.shape[0] < block_size:
+                    return
+                yield block
+
+class NpyDataStream(DataStream):
+    # Binary stream over a memory-mapped .npy file of shape (n_samples,) or (n_samples, n_columns)
+    def __init__(self, filename=None):
+        super().__init__(filename, header_lines=0)
+    def blocks(self, block_size, col_n):
+        data = np.load(self.filename, mmap_mode='r')
+        for start in range(0, data.shape[0] - block_size + 1, block_size):
+            block = data[start:start + block_size]
+            yield np.array(block if block.ndim == 1 else block[:, col_n], dtype=float)
+
+class ChunkedDataStream(DataStream):
+    # Stream over a chunked HDF5/NetCDF4 dataset (opened with h5py) or any array-like
+    # object supporting slicing along the first axis (h5py/netCDF4 variables, zarr arrays)
+    def __init__(self, source, dataset=None, chunk_blocks=64):
+        super().__init__(source if isinstance(source, str) else None, header_lines=0)
+        self.source = source
+        self.dataset = dataset
+        self.chunk_blocks = chunk_blocks
+    def _open(self):
+        if not isinstance(self.source, str):
+            return None, self.source
+        try:
+            import h5py
+        except ImportError:
+            raise ImportError("ChunkedDataStream needs h5py to read HDF5/NetCDF4 files; pass an open dataset instead.")
+        f = h5py.File(self.source, 'r')
+        return f, f[self.dataset]
+    def blocks(self, block_size, col_n):
+        f, data = self._open()
+        try:
+            n_samples = data.shape[0]
+            step = block_size * self.chunk_blocks
+            # read several blocks per I/O request, then split them without copying
+            for start in range(0, n_samples - block_size + 1, step):
+                n_full = min(step, n_samples - start) // block_size * block_size
+                chunk = np.asarray(data[start:start + n_full], dtype=float)
+                if chunk.ndim > 1:
+                    chunk = chunk[:, col_n]
+                for block in np.split(chunk, n_full // block_size):
+                    yield block
+        finally:
+            if f is not None:
+                f.close()
+
+class SocketDataStream(DataStream):
+    # Stream of raw binary samples (n_columns values of dtype per sample) from a connected
+    # socket or an address to connect to; the stream ends when the peer closes the connection
+    def __init__(self, address=None, n_columns=1, dtype='<f8', family=socket.AF_INET, sock=None):
+        super().__init__(None, header_lines=0)
+        self.address = address
+        self.n_columns = n_columns
+        self.dtype = np.dtype(dtype)
+        self.family = family
+        self.sock = sock
+    def blocks(self, block_size, col_n):
+        sock = self.sock
+        if sock is None:
+            sock = socket.socket(self.family, socket.SOCK_STREAM)
+            sock.connect(self.address)
+        buffer = bytearray(block_size * self.n_columns * self.dtype.itemsize)
+        view = memoryview(buffer)
+        try:
+            while True:
+                received = 0
+                while received < len(buffer):
+                    n = sock.recv_into(view[received:])
+                    if n == 0:
+                        return
+                    received += n
+                block = np.frombuffer(buffer, dtype=self.dtype).reshape(block_size, self.n_columns)
+                yield np.array(block[:, col_n], dtype=float)
+        finally:
+            if self.sock is None:
+                sock.close()
+
+def RUDER(window_length, initialization_length, data_stream: DataStream, col_n, filename, nu=0.1, detector='ocsvm', output_format='text'):
     '''
     Inputs: 
         window_length: Defines the length of the window used to construct the reduced trajectory matrix
         initialization_length: Defines the number of windows used in the computation of the PCA model 
-        data_stream: DataStream class object to read data from; assumes a text file with rows being observations, columns as features (only one row for header)
-        col_n: Column number in the DataStream text file to use
-        filename: Filename that will be used to output computed anomaly score
+        data_stream: DataStream class object to read data from; the base class reads a text file with rows being observations, columns as features
+            (only one row for header), NpyDataStream, ChunkedDataStream and SocketDataStream read binary blocks. A list of streams (e.g. one
+            file per satellite) is read in lockstep
+        col_n: Column number in the DataStream to use, or a list of columns (e.g. the NEC components) processed together as stacked channels
+        filename: Filename that will be used to output computed anomaly score; for several channels, a list with one filename per channel
+            (ordered stream by stream, then column by column)
         nu: Nu value to use in OC-SVM
+        detector: Novelty detector backend name or object (see detectors.make_detector); backends
+            with partial_fit are updated with the newest window only, keeping the per-step cost flat
+        output_format: 'text' writes one score per line; 'binary' appends each window of scores as raw float64
+            (read back with np.fromfile)
     ''' 
-    # step one: load initial data and perform PCA intialization
-    anomaly_weights = []
-    data = []
-    data_gen = data_stream.stream(data_stream.filename)
-    next(data_gen) # iterate past the header
-    for i in range(window_length*initialization_length): # get initialization data
-        data.append(float(next(data_gen).split(sep=',')[col_n])) # This gets the C component of the Swarm NEC data
-    traj = _TrajectoryMatrix()
-    traj.from_timeseries(data, window_length=window_length)
-    traj_data = traj.x
-
-    rpca_model = _RecursivePCA()
-    rpca_model.initialize_model(traj_data)
-
-    # step two: generate first set of principal component projections and classify with ocsvm
-    principal_components = rpca_model.compute_pcs(n_components=2)
-    # centering the data here ensures that the values output are the same as those
-    # output by the sklearn PCA algorithm; however, there's still ambiguity in the 
-    # sign of the eigenvectors output (i.e., v = -v)
-    fit_data = (traj_data - rpca_model.mean_matrix) @ principal_components
-
-    ocsvm = svm.OneClassSVM(nu=nu, kernel='rbf', gamma='scale')
-    ocsvm.fit(fit_data)
-    y_pred = ocsvm.predict(fit_data)
-    y_pred[y_pred < 0] = 0 # Floor at zero for easy summation analysis
-
-    # step three: generate flags for each window of data
-    anomaly_flags = np.zeros(len(data))
-    interval_start = 0
-    interval_stop = window_length
-    for i in y_pred:
-        if i != 1:
-            anomaly_flags[interval_start:interval_stop] += 1
-        interval_start = interval_stop
-        interval_stop = interval_stop + window_length
-    anomaly_weights.append(anomaly_flags)
-    anomaly_weights = np.array(anomaly_weights[0])
-
-    # step four: iteratively load data from data_stream
-    # when enough data to add a new window is loaded, iterate model
-    iteration_num = 1
-    with open(filename, 'w') as f:
-        while True: # This is probably bad practice, but this will continue to grab a new chunk of data until it breaks
+    if output_format not in ('text', 'binary'):
+        raise ValueError("output_format must be 'text' or 'binary'.")
+    multichannel = isinstance(data_stream, (list, tuple)) or not np.isscalar(col_n)
+    filenames = list(filename) if multichannel else [filename]
+
+    # step one: load initial data and initialize the streaming engine
+    if isinstance(data_stream, (list, tuple)):
+        blocks = _stacked_blocks(data_stream, window_length, col_n)
+    else:
+        blocks = data_stream.blocks(window_length, col_n)
+    data = np.concatenate([next(blocks) for i in range(initialization_length)]) # get initialization data
+    if multichannel and data.shape[1] != len(filenames):
+        raise ValueError(f'Expected {data.shape[1]} output filenames, one per channel, got {len(filenames)}.')
+    engine = RUDEREngine(window_length, initialization_length, nu=nu, detector=detector)
+    engine.initialize(data)
+
+    # step two: iteratively load windows from data_stream and iterate the model
+    with contextlib.ExitStack() as stack:
+        files = [stack.enter_context(open(name, 'w' if output_format == 'text' else 'wb')) for name in filenames]
+        for iteration_num, new_data in enumerate(blocks, start=1):
+            print(f'Iteration: {iteration_num}', end='\r')
+            finalized = engine.update(new_data).reshape(window_length, len(files))
+            for f, channel_scores in zip(files, finalized.T):
+                if output_format == 'binary':
+                    channel_scores.tofile(f)
+                else:
+                    f.write('\n'.join(map(str, channel_scores.tolist())) + '\n')
+    print('Finished Processing...')
+
+    return engine.pending()
+
+def _stacked_blocks(data_streams, block_size, col_n):
+    # read several streams in lockstep, stacking their selected columns side by side
+    generators = [data_stream.blocks(block_size, col_n) for data_stream in data_streams]
+    for blocks in zip(*generators):
+        yield np.column_stack(blocks)
+
+async def async_blocks(source, block_size, col_n=0, n_columns=1, dtype='<f8'):
+    '''
+    Rebuffers an asynchronous sample source into windows of block_size samples.
+
+    Inputs:
+        source: asyncio.StreamReader (e.g. from asyncio.open_connection or asyncio.open_unix_connection)
+            delivering raw binary samples of n_columns values of dtype; an asyncio.Queue whose items are
+            arrays of samples, shape (n,) or (n, n_columns), with None marking the end of the feed; or any
+            async iterable of such arrays
+        block_size: Number of samples per yielded window
+        col_n: Column (or list of columns) to keep
+        n_columns: Number of values per sample
+        dtype: Sample dtype of binary sources
+    '''
+    dtype = np.dtype(dtype)
+    if isinstance(source, asyncio.StreamReader):
+        n_bytes = block_size * n_columns * dtype.itemsize
+        while True:
             try:
-                print(f'Iteration: {iteration_num}', end='\r')
-                new_data = []
-                for i in range(window_length):
-                    new_data.append(float(next(data_gen).split(sep=',')[col_n]))
-                old_data = traj.update_row(new_data)
-                new_traj = traj.x
-                rpca_model.iterate_model(new_data, old_data)
-                new_principal_components = rpca_model.compute_pcs(n_components=2)
-                new_fit_data = (new_traj - rpca_model.mean_matrix) @ new_principal_components
-
-                ocsvm.fit(new_fit_data)
-                y_pred = ocsvm.predict(new_fit_data)
-                y_pred[y_pred < 0] = 0
-
-                new_anomaly_flags = np.zeros(len(data))
-                interval_start = 0
-                interval_stop = window_length
-                for i in y_pred:
-                    if i != 1:
-                        new_anomaly_flags[interval_start:interval_stop] += 1
-                    interval_start = interval_stop
-                    interval_stop = interval_stop + window_length
-
-                anomaly_weights[window_length:] += new_anomaly_flags[:-window_length]
-                anomaly_weights = np.concatenate((anomaly_weights, new_anomaly_flags[-window_length:]))
-                for element in anomaly_weights[0:window_length]:
-                    f.write(str(element) + '\n')
-                anomaly_weights = np.delete(anomaly_weights, np.s_[0:window_length])
-                iteration_num += 1
-            except:
-                print('Finished Processing...')
-                break
+                payload = await source.readexactly(n_bytes)
+            except asyncio.IncompleteReadError:
+                return
+            block = np.frombuffer(payload, dtype=dtype).reshape(block_size, n_columns)
+            yield np.array(block[:, col_n], dtype=float)
+
+    if isinstance(source, asyncio.Queue):
+        async def items(queue):
+            while (item := await queue.get()) is not None:
+                yield item
+        source = items(source)
+
+    pending = []
+    n_pending = 0
+    async for item in source:
+        item = np.asarray(item, dtype=float)
+        if item.ndim > 1:
+            item = item[:, col_n]
+        pending.append(item)
+        n_pending += item.shape[0]
+        if n_pending < block_size:
+            continue
+        samples = np.concatenate(pending)
+        n_full = n_pending // block_size * block_size
+        for block in np.split(samples[:n_full], n_full // block_size):
+            yield block
+        pending = [samples[n_full:]]
+        n_pending -= n_full
+
+async def ruder_async(window_length, initialization_length, source, sink, col_n=0, n_columns=1, dtype='<f8',
+                      nu=0.1, detector='ocsvm', executor=None):
+    '''
+    Asyncio RUDER runner for live telemetry. Model updates run in an executor so the event loop stays free to
+    serve other feeds; awaiting the sink provides backpressure, so a slow consumer pauses reading from the
+    source. Several spacecraft feeds are monitored by gathering one runner per feed, e.g.
+    await asyncio.gather(*(ruder_async(66, 50, reader, queue) for reader, queue in feeds)).
 
-    return anomaly_weights
+    Inputs:
+        window_length: Defines the length of the window used to construct the reduced trajectory matrix
+        initialization_length: Defines the number of windows used in the computation of the PCA model
+        source: Sample source accepted by async_blocks (StreamReader, asyncio.Queue or async iterable)
+        sink: asyncio.Queue (bounded for backpressure; None is put once the feed ends) or an async callable,
+            receiving the finalized anomaly scores of each window
+        col_n, n_columns, dtype: Column selection and binary layout, see async_blocks
+        nu: Nu value to use in OC-SVM
+        detector: Novelty detector backend name or object (see detectors.make_detector)
+        executor: concurrent.futures executor for the model updates (default: the loop's default executor)
+    Outputs:
+        Anomaly scores of the windows still inside the trajectory matrix when the feed ends
+    '''
+    loop = asyncio.get_running_loop()
+    blocks = async_blocks(source, window_length, col_n=col_n, n_columns=n_columns, dtype=dtype)
+
+    async def publish(scores):
+        if isinstance(sink, asyncio.Queue):
+            await sink.put(scores)
+        elif scores is not None:
+            await sink(scores)
+
+    try:
+        # step one: collect initialization windows and initialize the engine off the event loop
+        data = []
+        async for block in blocks:
+            data.append(block)
+            if len(data) == initialization_length:
+                break
+        else:
+            raise ValueError('Feed ended before initialization_length windows were received.')
+        engine = RUDEREngine(window_length, initialization_length, nu=nu, detector=detector)
+        await loop.run_in_executor(executor, engine.initialize, np.concatenate(data))
+
+        # step two: iterate the model on each new window and publish the finalized scores
+        async for new_data in blocks:
+            finalized = await loop.run_in_executor(executor, engine.update, new_data)
+            await publish(finalized)
+    finally:
+        await publish(None)
+        await blocks.aclose()
+
+    return engine.pending()
 
 if __name__ == '__main__':
     pass
\ No newline at end of file
@@ -0,0 +1,169 @@
+# ╔══════════════════════════════════════════════════════════════════════════════╗
+# ║              █ █ █ █ █   MAGPRIME Toolkit   █ █ █ █ █                        ║
+# ║ ──────────────────────────────────────────────────────────────────────────── ║
+# ║  Module       :  detectors.py                                                ║
+# ║  Package      :  magprime                                                    ║
+# ║  Created      :  2026-10-18                                                  ║
+# ║  Last Updated :  2026-10-18                                                  ║
+# ║  Python       :  ≥ 3.10                                                      ║
+# ║  License      :  MIT — see LICENSE.txt                                       ║
+# ║                                                                              ║
+# ║  Description  : Novelty detector backends shared by RUDE and RUDER. The      ║
+# ║  exact RBF One-Class SVM scales quadratically or worse in the number of      ║
+# ║  segments; the approximate backends here are linear-time and incremental.    ║
+# ╚══════════════════════════════════════════════════════════════════════════════╝
+
+import numpy as np
+from scipy.stats import chi2
+from sklearn import svm
+from sklearn.ensemble import IsolationForest
+from sklearn.kernel_approximation import Nystroem, RBFSampler
+from sklearn.linear_model import SGDOneClassSVM
+
+DETECTORS = ("ocsvm", "rff", "nystroem", "mahalanobis", "isolation")
+
+
+def make_detector(detector="ocsvm", nu=0.1, **kwargs):
+    """
+    Builds a novelty detector backend.
+
+    Parameters:
+    - detector: Backend name (one of DETECTORS) or an object exposing fit, predict
+      and decision_function, which is returned unchanged.
+        * "ocsvm": exact RBF One-Class SVM (original behavior).
+        * "rff": SGD One-Class SVM on random Fourier features.
+        * "nystroem": SGD One-Class SVM on a Nystroem kernel approximation.
+        * "mahalanobis": Gaussian scorer thresholded at the chi-square (1 - nu) quantile.
+        * "isolation": Isolation forest with contamination nu.
+    - nu: Expected fraction of anomalous segments.
+    - kwargs: Passed to the backend constructor.
+
+    Returns:
+    - Detector following the sklearn convention: predict returns 1 for normal and
+      -1 for anomalous samples, lower decision_function values are more anomalous.
+      Backends other than "ocsvm" and "isolation" also support partial_fit.
+    """
+    if not isinstance(detector, str):
+        return detector
+    if detector == "ocsvm":
+        return svm.OneClassSVM(nu=nu, kernel='rbf', gamma='scale', **kwargs)
+    if detector == "rff":
+        return KernelSGDOneClassSVM(nu=nu, approximation="rff", **kwargs)
+    if detector == "nystroem":
+        return KernelSGDOneClassSVM(nu=nu, approximation="nystroem", **kwargs)
+    if detector == "mahalanobis":
+        return MahalanobisDetector(nu=nu, **kwargs)
+    if detector == "isolation":
+        return IsolationForest(contamination=nu, **kwargs)
+    raise ValueError(f"Unknown detector '{detector}'. Choose from {DETECTORS}.")
+
+
+class KernelSGDOneClassSVM():
+    """
+    Linear-time One-Class SVM on an explicit approximation of the RBF kernel.
+
+    The kernel width follows gamma='scale' of the exact model and is fixed on the
+    first call to fit or partial_fit, so later batches update the same feature map.
+    """
+    def __init__(self, nu=0.1, approximation="rff", n_components=256, gamma="scale",
+                 random_state=0, **sgd_kwargs):
+        if approximation not in ("rff", "nystroem"):
+            raise ValueError("approximation must be 'rff' or 'nystroem'.")
+        self.nu = nu
+        self.approximation = approximation
+        self.n_components = n_components
+        self.gamma = gamma
+        self.random_state = random_state
+        self.sgd_kwargs = sgd_kwargs
+        self.feature_map_ = None
+        self.model_ = None
+
+    def _init_feature_map(self, X):
+        gamma = self.gamma
+        if gamma == "scale":
+            var = X.var()
+            gamma = 1.0 / (X.shape[1] * var) if var > 0 else 1.0
+        if self.approximation == "rff":
+            self.feature_map_ = RBFSampler(gamma=gamma, n_components=self.n_components,
+                                           random_state=self.random_state).fit(X)
+        else:
+            n_components = min(self.n_components, X.shape[0])
+            self.feature_map_ = Nystroem(gamma=gamma, n_components=n_components,
+                                         random_state=self.random_state).fit(X)
+        self.model_ = SGDOneClassSVM(nu=self.nu, random_state=self.random_state, **self.sgd_kwargs)
+
+    def fit(self, X, y=None):
+        X = np.asarray(X, dtype=float)
+        self._init_feature_map(X)
+        self.model_.fit(self.feature_map_.transform(X))
+        return self
+
+    def partial_fit(self, X, y=None):
+        X = np.asarray(X, dtype=float)
+        if self.model_ is None:
+            self._init_feature_map(X)
+        self.model_.partial_fit(self.feature_map_.transform(X))
+        return self
+
+    def decision_function(self, X):
+        return self.model_.decision_function(self.feature_map_.transform(np.asarray(X, dtype=float)))
+
+    def predict(self, X):
+        return np.where(self.decision_function(X) < 0, -1, 1)
+
+
+class MahalanobisDetector():
+    """
+    Gaussian novelty scorer with streaming mean and covariance.
+
+    A sample is anomalous when its squared Mahalanobis distance exceeds the
+    chi-square (1 - nu) quantile. partial_fit merges batch moments, optionally
+    discounting older batches by the forgetting factor.
+    """
+    def __init__(self, nu=0.1, forgetting=1.0, reg=1e-9):
+        self.nu = nu
+        self.forgetting = forgetting
+        self.reg = reg
+        self.reset()
+
+    def reset(self):
+        self.n_ = 0.0
+        self.mean_ = None
+        self.m2_ = None
+        self.precision_ = None
+        self.threshold_ = None
+
+    def fit(self, X, y=None):
+        self.reset()
+        return self.partial_fit(X)
+
+    def partial_fit(self, X, y=None):
+        X = np.atleast_2d(np.asarray(X, dtype=float))
+        n_b = X.shape[0]
+        mean_b = X.mean(axis=0)
+        diff = X - mean_b
+        m2_b = diff.T @ diff
+        if self.mean_ is None:
+            self.n_, self.mean_, self.m2_ = float(n_b), mean_b, m2_b
+        else:
+            # Chan merge of discounted running moments with the batch moments
+            n_a = self.n_ * self.forgetting
+            m2_a = self.m2_ * self.forgetting
+            n = n_a + n_b
+            delta = mean_b - self.mean_
+            self.mean_ = self.mean_ + delta * (n_b / n)
+            self.m2_ = m2_a + m2_b + np.outer(delta, delta) * (n_a * n_b / n)
+            self.n_ = n
+        cov = self.m2_ / max(self.n_ - 1.0, 1.0)
+        cov[np.diag_indices_from(cov)] += self.reg * max(np.trace(cov), 1.0)
+        self.precision_ = np.linalg.pinv(cov, hermitian=True)
+        self.threshold_ = chi2.ppf(1.0 - self.nu, df=X.shape[1])
+        return self
+
+    def decision_function(self, X):
+        diff = np.atleast_2d(np.asarray(X, dtype=float)) - self.mean_
+        d2 = np.einsum('ij,jk,ik->i', diff, self.precision_, diff)
+        return self.threshold_ - d2
+
+    def predict(self, X):
+        return np.where(self.decision_function(X) < 0, -1, 1)
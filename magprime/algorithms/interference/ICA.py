@@ -16,7 +16,6 @@
 
 from sklearn.decomposition import FastICA
 import numpy as np
-from scipy import stats
 from scipy.ndimage import uniform_filter1d
 from sklearn.metrics.pairwise import cosine_similarity
 
@@ -56,17 +55,9 @@ def cleanAxis(B):
     S_ = S_.T
     
     "Find Ambient IC through lowest correlation with the difference"
-    diff = np.zeros(B.shape[-1])
-    for i in range(B.shape[0]-1):
-        diff += (B[i+1] - B[i])
-
-    r = np.zeros(B.shape[0])
-    for i in range(B.shape[0]):
-        r[i] = np.abs(stats.pearsonr(diff, S_[i])[0])
-        
-    "Reapply Trend"
-    recovered_signal = S_[np.argmin(r)]
+    recovered_signal = S_[_select_axis_ic(B, S_)]
     
+    "Reapply Trend"
     if(detrend):
         recovered_signal += np.mean(trend, axis = 0)
 
@@ -94,17 +85,8 @@ def cleanTriAxis(B):
     S_ = S_.T
     
     "Find Natural IC through lowest correlation with the difference"
-    expected_mixing = np.ones(n_sensors)
-    gain = np.ones(n_axes)
-    args = []
     step = n_sensors
-    for axis in range(n_axes):
-        axis_mixing = ica.mixing_[axis*step:(axis+1)*step]
-        cosine_similarities = [np.dot(col, expected_mixing) / (np.linalg.norm(col) * np.linalg.norm(expected_mixing)) for col in axis_mixing.T]
-    
-        args.append(np.argmax(np.abs(cosine_similarities)))
-        gain[axis] = np.mean(axis_mixing.T[np.argmax(np.abs(cosine_similarities))])
-
+    args, gain = _select_triaxis_ic(ica.mixing_, n_sensors, n_axes)
     gain = list(gain)
 
     # Todo find gain through averaging the amb field vector using args
@@ -122,4 +104,160 @@ def cleanTriAxis(B):
         recovered_signal[2] = S_[args[2]]*gain[2]
 
 
-    return(recovered_signal)
\ No newline at end of file
+    return(recovered_signal)
+
+
+def _whitening(X):
+    """
+    PCA whitening transform (n_components, n_features) of centred X (n_samples, n_features).
+    Near-null directions of a rank-deficient array are dropped, so tiny or negative
+    eigenvalues never inflate the noise.
+    """
+    d, E = np.linalg.eigh(X.T @ X / X.shape[0])
+    keep = d > d.max() * X.shape[1] * np.finfo(d.dtype).eps
+    d, E = d[keep][::-1], E[:, keep][:, ::-1]
+    return((E / np.sqrt(d)).T)
+
+def _select_axis_ic(B, S_):
+    """
+    Index of the IC with the lowest correlation to the summed sensor differences
+    B: detrended single-axis measurements (n_sensors, n_samples)
+    S_: independent components (n_components, n_samples)
+    """
+    "The summed consecutive differences telescope to last minus first sensor"
+    diff = B[-1] - B[0]
+    diff = diff - diff.mean()
+    S_c = S_ - S_.mean(axis=1, keepdims=True)
+
+    "Pearson correlation of every IC with the difference at once"
+    r = np.abs(S_c @ diff) / (np.linalg.norm(S_c, axis=1) * np.linalg.norm(diff))
+    return(np.argmin(r))
+
+def _select_triaxis_ic(mixing, n_sensors, n_axes):
+    """
+    Per axis, the IC whose mixing column best matches equal coupling to all sensors
+    mixing: ICA mixing matrix (n_sensors * n_axes, n_components)
+    Output:
+        args: selected IC index per axis
+        gain: mean mixing coefficient of the selected IC per axis
+    """
+    axis_mixing = mixing[:n_axes*n_sensors].reshape(n_axes, n_sensors, -1)
+
+    "Cosine similarity of every mixing column with the all-ones vector, per axis"
+    cosine_similarities = axis_mixing.sum(axis=1) / (np.linalg.norm(axis_mixing, axis=1) * np.sqrt(n_sensors))
+    args = np.argmax(np.abs(cosine_similarities), axis=1)
+    gain = axis_mixing[np.arange(n_axes), :, args].mean(axis=1)
+    return(args, gain)
+
+
+class WarmStartICA:
+    def __init__(self, max_iter=20000, tol=1e-8, triaxial_max_iter=1000, triaxial_tol=1e-4):
+        """
+        ICA cleaner for consecutive windows of the same sensor array. Each fit is
+        seeded with the previous window's unmixing matrix through FastICA's w_init,
+        so a slowly varying mixing converges in a few iterations.
+        Parameters
+        ----------
+        max_iter, tol : int, float
+            FastICA iteration limit and tolerance of cleanAxis (as in the module cleanAxis)
+        triaxial_max_iter, triaxial_tol : int, float
+            FastICA iteration limit and tolerance of cleanTriAxis (as in the module cleanTriAxis)
+        """
+        self.max_iter = max_iter
+        self.tol = tol
+        self.triaxial_max_iter = triaxial_max_iter
+        self.triaxial_tol = triaxial_tol
+        self.reset()
+
+    def reset(self):
+        """Drop the warm-start state."""
+        self.unmixing_ = None       # Unmixing matrix of the previous window (space of the fitted data)
+        self.sensor_unmixing_ = None  # Previous cleanTriAxis unmixing expressed on the sensor signals
+        self.whitening_ = None      # Whitening transform of the last cleanTriAxis window (n_components, n_features)
+        self.n_iter_ = []           # FastICA iterations used per window
+
+    def clean(self, B, triaxial = True):
+        """
+        B: magnetic field measurements from the sensor array (n_sensors, axes, n_samples)
+        triaxial: boolean for whether to use triaxial or uniaxial ICA
+        """
+        if(triaxial):
+            result = self.cleanTriAxis(B)
+        else:
+            result = self.cleanAxis(B)
+
+        return(result)
+
+    def _fit(self, X, w_init=None, max_iter=None, tol=None):
+        "Fit FastICA without whitening on X (n_samples, n_features), seeded with w_init or the previous unmixing"
+        n_components = X.shape[1] # fixed by the data, as FastICA ignores n_components without whitening
+        if w_init is None:
+            w_init = self.unmixing_
+        if w_init is not None and w_init.shape != (n_components, n_components):
+            w_init = None
+        ica = FastICA(whiten=False,
+                      max_iter=self.max_iter if max_iter is None else max_iter,
+                      tol=self.tol if tol is None else tol, w_init=w_init)
+        S_ = ica.fit_transform(X)
+        self.unmixing_ = ica.components_
+        self.n_iter_.append(ica.n_iter_)
+        return(ica, S_.T)
+
+    def cleanAxis(self, B):
+        """
+        B: single-axis measurements from the sensor array (n_sensors, n_samples)
+        """
+        "Remove Trend"
+        if(detrend): 
+            trend = uniform_filter1d(B, size=uf)
+            B = B - trend
+        
+        "Apply ICA"
+        _, S_ = self._fit(B.T)
+        
+        "Find Ambient IC through lowest correlation with the difference"
+        recovered_signal = S_[_select_axis_ic(B, S_)]
+        
+        "Reapply Trend"
+        if(detrend):
+            recovered_signal += np.mean(trend, axis = 0)
+
+        return(recovered_signal)
+
+    def cleanTriAxis(self, B):
+        """
+        B: magnetic field measurements from the sensor array (n_sensors, axes, n_samples)
+        """
+        n_sensors, n_axes, n_samples = B.shape
+        sig = B.transpose(1, 0, 2).reshape(n_sensors * n_axes, n_samples)
+        
+        "Remove Trend"
+        if(detrend): 
+            trend = uniform_filter1d(sig, size=uf)
+            sig = sig - trend
+        
+        "Whiten this window; FastICA(whiten=False) needs exactly white input"
+        X = sig.T - np.mean(sig, axis=1)
+        self.whitening_ = _whitening(X)
+        
+        "Apply ICA, mapping the previous sensor-space unmixing into this window's whitened space"
+        w_init = None
+        if self.sensor_unmixing_ is not None and self.sensor_unmixing_.shape == self.whitening_.shape:
+            w_init = self.sensor_unmixing_ @ np.linalg.pinv(self.whitening_)
+        ica, S_ = self._fit(X @ self.whitening_.T, w_init=w_init,
+                            max_iter=self.triaxial_max_iter, tol=self.triaxial_tol)
+        self.sensor_unmixing_ = ica.components_ @ self.whitening_
+        mixing = np.linalg.pinv(self.sensor_unmixing_)
+        
+        "Find Natural IC through lowest correlation with the difference"
+        step = n_sensors
+        args, gain = _select_triaxis_ic(mixing, n_sensors, n_axes)
+        
+        "Select IC's and reapply trend"
+        recovered_signal = np.zeros((n_axes, n_samples))
+        for axis in range(n_axes):
+            recovered_signal[axis] = S_[args[axis]]*gain[axis]
+            if(detrend):
+                recovered_signal[axis] += np.mean(trend[axis*step:(axis+1)*step], axis = 0)
+
+        return(recovered_signal)
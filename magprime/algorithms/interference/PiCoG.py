@@ -15,7 +15,6 @@
 # ╚══════════════════════════════════════════════════════════════════════════════╝
 
 import numpy as np
-from sklearn.decomposition import PCA
 from scipy.spatial.transform import Rotation as R
 from scipy.ndimage import uniform_filter1d
 
@@ -27,9 +26,10 @@ def clean(B, triaxial = True):
     """
     Perform Principal Component gradiometry PCA on the magnetic field data
     Input:
-        B: magnetic field measurements from the sensor array (n_sensors, axes, n_samples)
+        B: magnetic field measurements from the sensor array (n_sensors, axes, n_samples),
+           optionally with leading window dimensions (..., n_sensors, axes, n_samples)
     Output:
-        result: reconstructed ambient field without the spacecraft-generated fields (axes, n_samples)
+        result: reconstructed ambient field without the spacecraft-generated fields (..., axes, n_samples)
     """
     if(detrend):
         trend = uniform_filter1d(B, size=uf, axis = -1)
@@ -41,50 +41,221 @@ def clean(B, triaxial = True):
     result = clean_first_order(B)
 
     if(detrend):
-        result += np.mean(trend, axis=0)
+        result += np.mean(trend, axis=-3)
 
             
     # Return the corrected magnetic field data
     return result
 
-def clean_first_order(B):
-    B_corrected = np.zeros(B.shape[1:])
-
-    # Compute the difference between the measurements from the two sensors
-    Delta_B = B[1] - B[0]
-
-    # Find VPS coordinate system of Delta_B
-    pca = PCA(n_components=3)
-    pca.fit(Delta_B.T)
-    max_var_dir = pca.components_[0]
-    Delta_B_rot, rotation_deltab = rotate_data(Delta_B, max_var_dir)
-    r1 = rotation_deltab.as_matrix()
-
-    # Find VPS coordinate system of B0
-    pca = PCA(n_components=3)
-    pca.fit(B[1].T)
-    max_var_dir = pca.components_[0]
-    B_rot, rotation_b0 = rotate_data(B[1], max_var_dir)
-    r2 = rotation_b0.as_matrix()
-
-    # Compute the scaling factor alpha and coupling matrix
-    for i in range(3):
-        alpha = np.sqrt(np.var(B_rot[i]) / np.var(Delta_B_rot[i]))
-        A = -alpha * np.linalg.inv(r2) @ r1
+def clean_first_order(B, out=None):
+    """
+    First order PiCoG correction of sensor 1 using the sensor difference
+    Input:
+        B: measurements of two triaxial sensors (..., 2, axes, n_samples); leading
+           dimensions are independent windows that are corrected in one batch
+        out: optional preallocated output array (..., axes, n_samples)
+    Output:
+        B_corrected: corrected magnetic field data (..., axes, n_samples)
+    """
+    B = np.asarray(B)
+    Delta_B = B[..., 1, :, :] - B[..., 0, :, :]
+    A = coupling_matrix(B[..., 1, :, :], Delta_B)
 
-        B_corrected = B[1] + A @ Delta_B
+    # B_corrected = B[1] + A @ Delta_B
+    B_corrected = np.matmul(A, Delta_B, out=out)
+    B_corrected += B[..., 1, :, :]
 
     # Return the corrected magnetic field data
     return B_corrected
 
 def clean_higher_order(B, order = 2):
-    B_new = np.copy(B)
+    """
+    Iterated PiCoG where both sensors are corrected against each other each pass
+    Input:
+        B: measurements of two triaxial sensors (..., 2, axes, n_samples)
+        order: number of iterations
+    Output:
+        B_corrected: corrected field of sensor 1 (..., axes, n_samples)
+    """
+    B_new = np.array(B, dtype=float)
+    B_ref, B_other = B_new[..., 1, :, :], B_new[..., 0, :, :]
+    Delta_B = np.empty_like(B_ref)
+    correction = np.empty_like(B_ref)
     for i in range(order):
-        B_0 = clean_first_order(B_new)
-        B_1 = clean_first_order(B_new[[1,0]])
-        B_new = np.stack((B_0,B_1))
-    return(B_0)
+        np.subtract(B_ref, B_other, out=Delta_B)
+
+        # cov(-Delta_B) == cov(Delta_B), so the swapped pair only changes the reference sensor
+        A_ref = coupling_matrix(B_ref, Delta_B)
+        A_other = coupling_matrix(B_other, Delta_B)
+
+        # B_0 = B[1] + A_ref @ (B[1] - B[0]) and B_1 = B[0] + A_other @ (B[0] - B[1]), in place
+        np.matmul(A_other, Delta_B, out=correction)
+        B_other -= correction
+        np.matmul(A_ref, Delta_B, out=correction)
+        B_ref += correction
+
+        # The next pass uses np.stack((B_0, B_1)), i.e. B_1 becomes the reference sensor
+        B_ref, B_other = B_other, B_ref
+    return(B_other)
+
+def coupling_matrix(B, Delta_B):
+    """
+    PiCoG coupling matrix A such that B + A @ Delta_B removes the common disturbance
+    Input:
+        B: reference sensor measurements (..., axes, n_samples)
+        Delta_B: sensor difference (..., axes, n_samples)
+    Output:
+        A: coupling matrix (..., axes, axes)
+    """
+    return _coupling_from_covariance(_covariance(B), _covariance(Delta_B))
+
+def _coupling_from_covariance(cov_b, cov_deltab):
+    "Coupling matrix (..., axes, axes) from the 3x3 covariances of B and Delta_B"
+    # Find VPS coordinate systems of Delta_B and B
+    r1 = _rotation_matrix(_max_variance_direction(cov_deltab))
+    r2 = _rotation_matrix(_max_variance_direction(cov_b))
+
+    # Variances along the last rotated axis are diagonals of r @ C @ r.T
+    var_deltab = np.einsum('...j,...jk,...k->...', r1[..., 2, :], cov_deltab, r1[..., 2, :])
+    var_b = np.einsum('...j,...jk,...k->...', r2[..., 2, :], cov_b, r2[..., 2, :])
+    alpha = np.sqrt(var_b / var_deltab)
+
+    # Rotation matrices are orthogonal, so inv(r2) == r2.T
+    return -alpha[..., None, None] * (np.swapaxes(r2, -1, -2) @ r1)
+
+def _covariance(X):
+    "Covariance matrices (..., axes, axes) of (..., axes, n_samples)"
+    Xc = X - X.mean(axis=-1, keepdims=True)
+    return (Xc @ np.swapaxes(Xc, -1, -2)) / (X.shape[-1] - 1)
+
+def _max_variance_direction(C):
+    "Leading eigenvector of a covariance, with the sign convention of sklearn PCA"
+    _, eigenvectors = np.linalg.eigh(C)
+    v = eigenvectors[..., :, -1]
+    sign = np.sign(np.take_along_axis(v, np.argmax(np.abs(v), axis=-1)[..., None], axis=-1))
+    return v * sign
 
+def _rotation_matrix(vector):
+    """
+    Rotation matrices (..., 3, 3) applied by rotate_data for the given directions
+    Input:
+        vector: array of vector directions with shape (..., 3)
+    """
+    vector = vector / np.linalg.norm(vector, axis=-1, keepdims=True)
+    x_axis = np.array([1., 0., 0.])
+
+    # Same rotation vector as rotate_data: arccos(x . v) * (x cross v)
+    rotvec = np.arccos(np.clip(vector[..., 0], -1, 1))[..., None] * np.cross(x_axis, vector)
+    theta = np.linalg.norm(rotvec, axis=-1)
+    k = rotvec / np.where(theta > 0, theta, 1)[..., None]
+
+    # Rodrigues' formula
+    K = np.zeros(vector.shape[:-1] + (3, 3))
+    K[..., 0, 1], K[..., 0, 2] = -k[..., 2], k[..., 1]
+    K[..., 1, 0], K[..., 1, 2] = k[..., 2], -k[..., 0]
+    K[..., 2, 0], K[..., 2, 1] = -k[..., 1], k[..., 0]
+    sin, cos = np.sin(theta)[..., None, None], np.cos(theta)[..., None, None]
+    return np.eye(3) + sin * K + (1 - cos) * (K @ K)
+
+
+class AdaptivePiCoG:
+    def __init__(self, forgetting=1.0):
+        """
+        Windowed PiCoG for drifting spacecraft fields. Running 3x3 covariances of
+        Delta_B and B are updated block by block (O(1) per sample) and the coupling
+        matrix is refreshed from them for every window.
+        Parameters
+        ----------
+        forgetting : float
+            Per-sample exponential forgetting factor in (0, 1]. 1 accumulates all
+            samples with equal weight (Welford); smaller values track drift, with
+            an effective memory of about 1 / (1 - forgetting) samples
+        """
+        if not 0 < forgetting <= 1:
+            raise ValueError("'forgetting' must be in (0, 1]")
+        self.forgetting = forgetting
+        self.reset()
+
+    def reset(self):
+        """Clear the running statistics."""
+        self.weight = 0.0                   # Total (decayed) sample weight
+        self.mean_b = np.zeros(3)           # Running mean of B[1]
+        self.mean_deltab = np.zeros(3)      # Running mean of B[1] - B[0]
+        self.scatter_b = np.zeros((3, 3))   # Weighted scatter matrix of B[1]
+        self.scatter_deltab = np.zeros((3, 3))
+        self.A = None                       # Current coupling matrix
+
+    def update(self, B):
+        """
+        Fold a window of samples into the running covariances and refresh A
+        Input:
+            B: measurements of two triaxial sensors (2, axes, n_samples)
+        """
+        Delta_B = B[1] - B[0]
+        n = B.shape[-1]
+        if self.forgetting == 1:
+            w = np.ones(n)
+        else:
+            w = self.forgetting ** np.arange(n - 1, -1, -1, dtype=float)
+        self.mean_b, self.scatter_b, weight = self._merge(self.mean_b, self.scatter_b, B[1], w)
+        self.mean_deltab, self.scatter_deltab, _ = self._merge(self.mean_deltab, self.scatter_deltab, Delta_B, w)
+        self.weight = weight
+        self.A = _coupling_from_covariance(self.scatter_b, self.scatter_deltab)
+        return self.A
+
+    def _merge(self, mean, scatter, X, w):
+        "Combine decayed running statistics with a weighted block (Chan et al. pairwise update)"
+        decay = self.forgetting ** X.shape[-1]
+        w_old = self.weight * decay
+        w_new = np.sum(w)
+        mean_new = X @ w / w_new
+        Xc = X - mean_new[:, None]
+        scatter_new = (Xc * w) @ Xc.T
+        total = w_old + w_new
+        delta = mean_new - mean
+        mean = mean + delta * (w_new / total)
+        scatter = scatter * decay + scatter_new + np.outer(delta, delta) * (w_old * w_new / total)
+        return mean, scatter, total
+
+    def clean(self, B):
+        """
+        Update the coupling with a window and return its corrected field
+        Input:
+            B: measurements of two triaxial sensors (2, axes, n_samples)
+        Output:
+            B_corrected: corrected magnetic field data (axes, n_samples)
+        """
+        A = self.update(B)
+        return B[1] + A @ (B[1] - B[0])
+
+    def stream(self, windows):
+        """Yield the corrected field for each (2, axes, n_samples) window of an iterable."""
+        for B in windows:
+            yield self.clean(B)
+
+
+def clean_adaptive(B, window=1000, forgetting=1.0):
+    """
+    Windowed PiCoG with streaming covariance accumulation
+    Input:
+        B: magnetic field measurements from the sensor array (2, axes, n_samples)
+        window: number of samples per coupling refresh
+        forgetting: per-sample exponential forgetting factor, see AdaptivePiCoG
+    Output:
+        result: reconstructed ambient field (axes, n_samples)
+    """
+    if(detrend):
+        trend = uniform_filter1d(B, size=uf, axis = -1)
+        B = B - trend
+
+    engine = AdaptivePiCoG(forgetting=forgetting)
+    result = np.empty(B.shape[1:])
+    for start in range(0, B.shape[-1], window):
+        result[:, start:start+window] = engine.clean(B[..., start:start+window])
+
+    if(detrend):
+        result += np.mean(trend, axis=0)
+    return result
 
 
 def rotate_data(data, vector):
@@ -18,22 +18,87 @@
 # ║   and Space Science (2024).                                                  ║
 # ╚══════════════════════════════════════════════════════════════════════════════╝
 
-from magprime.algorithms.anomaly.RUDE import anomaly_detection
+from concurrent.futures import ProcessPoolExecutor
+from magprime.algorithms.anomaly import RUDE
+from magprime.algorithms.anomaly.detectors import make_detector
 from magprime.utility import load_crm_data
+from scipy.fft import rfft
 import numpy as np
 
-def anomaly_tracker(s, window_length=10, nu=0.1):
-    power_at_each_time = []
-    for col in range(np.shape(s)[1]):
-        power_at_each_time.append(np.log(s[:,col]))
+def anomaly_tracker(s, window_length=10, nu=0.1, n_jobs=1, chunk_size=256, out=None):
+    """
+    Flags anomalous frequency bands in every time column of a spectrogram with RUDE.
 
-    flags_at_each_time = []
-    for time_step in power_at_each_time:
-        time_step_flags = anomaly_detection(time_step, 1, window_length, nu)
-        flags_at_each_time.append(time_step_flags)
+    Each column of log power is detrended, split into windows of window_length
+    frequency bins and reduced with PCA exactly as RUDE.anomaly_detection does
+    (honouring RUDE's module-level detrend, uf, use_fft and detector settings).
+    Columns are processed in chunks: detrending, segmentation and PCA are
+    batched over the chunk, and the per-column detector fits are spread over a
+    process pool.
 
-    output_image = np.zeros(np.shape(s))
-    for idx, observation in enumerate(flags_at_each_time):
-        output_image[:,idx] = observation
+    Parameters:
+    - s: Spectrogram of shape (n_frequencies, n_times) with positive power.
+    - window_length: Window length in frequency bins.
+    - nu: Parameter for One-Class SVM (nu).
+    - n_jobs: Number of worker processes fitting column detectors (1 runs in-process, -1 uses all cores).
+    - chunk_size: Number of columns processed per batch.
+    - out: Optional preallocated (n_frequencies, n_times) array (e.g. a memmap) receiving the flags.
 
-    return output_image
\ No newline at end of file
+    Returns:
+    - output_image: Flag image of the same shape as s (out if given).
+    """
+    n_freq, n_times = np.shape(s)
+    output_image = np.zeros((n_freq, n_times)) if out is None else out
+    if out is not None and out.shape != (n_freq, n_times):
+        raise ValueError(f"out has shape {out.shape}, expected {(n_freq, n_times)}.")
+
+    n_windows = n_freq // window_length
+    n_valid = n_windows * window_length
+    output_image[n_valid:] = 0
+    chunks = [slice(start, min(start + chunk_size, n_times)) for start in range(0, n_times, chunk_size)]
+    detector = RUDE.detector
+
+    if n_jobs == 1:
+        for cols in chunks:
+            flags = _fit_columns(_column_features(s[:, cols], window_length), nu, detector)
+            _write_flags(output_image, cols, flags, window_length)
+        return output_image
+
+    with ProcessPoolExecutor(max_workers=n_jobs if n_jobs > 0 else None) as pool:
+        # overlap feature extraction in this process with detector fits in the workers
+        futures = [(cols, pool.submit(_fit_columns, _column_features(s[:, cols], window_length), nu, detector))
+                   for cols in chunks]
+        for cols, future in futures:
+            _write_flags(output_image, cols, future.result(), window_length)
+
+    return output_image
+
+def _column_features(s_chunk, window_length):
+    # Batched RUDE preprocessing: (n_freq, n_cols) spectrogram chunk -> (n_cols, n_windows, 2) PCA scores
+    power = np.log(np.asarray(s_chunk, dtype=float).T)
+    if RUDE.detrend:
+        power -= RUDE.uniform_filter1d(power, size=RUDE.uf, axis=-1)
+
+    n_windows = power.shape[1] // window_length
+    segments = power[:, :n_windows * window_length].reshape(power.shape[0], n_windows, window_length)
+    if RUDE.use_fft:
+        segments = np.abs(rfft(segments, axis=-1))
+
+    # PCA with two components for every column at once
+    segments = segments - segments.mean(axis=1, keepdims=True)
+    U, S, Vt = np.linalg.svd(segments, full_matrices=False)
+    return U[..., :2] * S[..., None, :2]
+
+def _fit_columns(features, nu, detector):
+    # One detector per column; returns (n_cols, n_windows) anomalous-window flags
+    flags = np.empty(features.shape[:2])
+    for c, column_features in enumerate(features):
+        model = make_detector(detector, nu)
+        model.fit(column_features)
+        flags[c] = model.predict(column_features) < 0
+    return flags
+
+def _write_flags(output_image, cols, flags, window_length):
+    # expand window flags to frequency bins directly into the output image
+    n_valid = flags.shape[1] * window_length
+    output_image[:n_valid, cols] = np.repeat(flags.T, window_length, axis=0)
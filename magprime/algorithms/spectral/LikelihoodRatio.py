@@ -18,29 +18,110 @@
 # ╚══════════════════════════════════════════════════════════════════════════════╝
 
 import numpy as np
-from scipy.stats import trim_mean
 from scipy.ndimage import uniform_filter1d, median_filter
 
-def likelihood_ratio(s, threshold=3):
-    broadband_s = np.zeros(np.shape(s))
-    narrowband_s = np.zeros(np.shape(s))
-    for i in range(np.shape(s)[1]):
-        raw_spectrum = s[:,i]
-        broadband_spectrum = uniform_filter1d(raw_spectrum, 10)
-        narrowband_spectrum = raw_spectrum - broadband_spectrum
-        narrowband_spectrum = narrowband_spectrum - trim_mean(narrowband_spectrum, 0.10)
+def likelihood_ratio(s, threshold=3, chunk_size=None):
+    """
+    Detects narrowband spectral tracks with the likelihood ratio test.
 
-        broadband_s[:,i] = broadband_spectrum
-        narrowband_s[:,i] = narrowband_spectrum
+    Parameters:
+    - s: Spectrogram of shape (n_frequencies, n_times).
+    - threshold: Detection threshold on the test statistic.
+    - chunk_size: Optional number of columns processed at a time; bounds the
+      float temporaries to (n_frequencies, chunk_size) for very long spectrograms.
 
-    SNR_ij = narrowband_s / broadband_s
-    SNR_ij_p1 = SNR_ij + np.ones(np.shape(SNR_ij))
-    Sb_ij = broadband_s
+    Returns:
+    - median_filtered_detections: uint8 detection image, median filtered over 3 time bins.
+    """
+    s = np.asarray(s)
+    n_times = np.shape(s)[1]
+    if chunk_size is None:
+        detected_pixels = _detect_pixels(s, threshold)
+    else:
+        detected_pixels = np.empty(np.shape(s), dtype=np.uint8)
+        for start in range(0, n_times, chunk_size):
+            cols = slice(start, start + chunk_size)
+            detected_pixels[:, cols] = _detect_pixels(s[:, cols], threshold)
 
-    test_statistic = (SNR_ij / SNR_ij_p1) * (s / Sb_ij)
+    median_filtered_detections = median_filter(detected_pixels, (1,3))
 
-    detected_pixels = (test_statistic > threshold).astype(np.uint8)
+    return median_filtered_detections
 
-    median_filtered_detections = median_filter(detected_pixels, (1,3))
+class LikelihoodRatioStream():
+    """
+    Streaming likelihood ratio detector fed with spectrogram columns as they are produced.
+
+    Each column's test statistic only depends on that column; the (1, 3) median filter
+    along time delays the output by one column. Concatenating the outputs of update()
+    and flush() reproduces likelihood_ratio() on the full spectrogram.
+    """
+    def __init__(self, threshold=3):
+        self.threshold = threshold
+        self.reset()
+
+    def reset(self):
+        self._previous = None   # detections of the last emitted column
+        self._current = None    # detections of the column awaiting its right neighbour
+
+    def update(self, columns):
+        """
+        Adds spectrogram columns, shape (n_frequencies,) or (n_frequencies, k), and returns the
+        median-filtered detections of the columns that can be finalized, shape (n_frequencies, m).
+        """
+        columns = np.asarray(columns)
+        if columns.ndim == 1:
+            columns = columns[:, None]
+        detected = _detect_pixels(columns, self.threshold)
+        if self._current is None:
+            if detected.shape[1] == 0:
+                return detected
+            # 'reflect' boundary: the first column is its own left neighbour
+            self._previous = detected[:, :1]
+            self._current, detected = detected[:, :1], detected[:, 1:]
+        window = np.concatenate((self._previous, self._current, detected), axis=1)
+        self._previous = window[:, -2:-1]
+        self._current = window[:, -1:]
+        return _majority(window)
+
+    def flush(self):
+        """
+        Finalizes the last column ('reflect' boundary: it is its own right neighbour).
+        """
+        if self._current is None:
+            return np.empty((0, 0), dtype=np.uint8)
+        window = np.concatenate((self._previous, self._current, self._current), axis=1)
+        self.reset()
+        return _majority(window)
+
+def _majority(window):
+    # median of three binary images over consecutive columns
+    votes = window[:, :-2] + window[:, 1:-1]
+    votes += window[:, 2:]
+    return (votes >= 2).astype(np.uint8)
+
+def _detect_pixels(s, threshold):
+    # Test statistic of every pixel in a few whole-array passes, reusing two float buffers
+    s = np.asarray(s, dtype=float)
+    broadband_s = uniform_filter1d(s, 10, axis=0)
+
+    narrowband_s = np.subtract(s, broadband_s)
+    narrowband_s -= _trim_mean(narrowband_s, 0.10)
+
+    SNR_ij = np.divide(narrowband_s, broadband_s, out=narrowband_s)
+    ratio = np.add(SNR_ij, 1)
+    np.divide(SNR_ij, ratio, out=ratio)
+    Sb_ij = np.divide(s, broadband_s, out=broadband_s)
+
+    test_statistic = np.multiply(ratio, Sb_ij, out=ratio)
+
+    return (test_statistic > threshold).astype(np.uint8)
 
-    return median_filtered_detections
\ No newline at end of file
+def _trim_mean(a, proportiontocut):
+    # scipy.stats.trim_mean along axis 0 via a single partition of the kept range
+    nobs = a.shape[0]
+    lowercut = int(proportiontocut * nobs)
+    uppercut = nobs - lowercut
+    if lowercut >= uppercut:
+        raise ValueError("Proportion too big.")
+    partitioned = np.partition(a, (lowercut, uppercut - 1), axis=0)
+    return partitioned[lowercut:uppercut].mean(axis=0)
@@ -0,0 +1,139 @@
+# ╔══════════════════════════════════════════════════════════════════════════════╗
+# ║              █ █ █ █ █   MAGPRIME Toolkit   █ █ █ █ █                        ║
+# ║ ──────────────────────────────────────────────────────────────────────────── ║
+# ║  Module       :  Spectrogram.py                                              ║
+# ║  Package      :  magprime                                                    ║
+# ║  Created      :  2026-10-18                                                  ║
+# ║  Last Updated :  2026-10-18                                                  ║
+# ║  Python       :  ≥ 3.10                                                      ║
+# ║  License      :  MIT — see LICENSE.txt                                       ║
+# ║                                                                              ║
+# ║  Description  : Streaming short-time Fourier transform producing spectrogram ║
+# ║  blocks for the spectral track detectors (LikelihoodRatio, AnomalyTracker)   ║
+# ║  without holding the full spectrogram of long magnetometer records.          ║
+# ╚══════════════════════════════════════════════════════════════════════════════╝
+
+from functools import lru_cache
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import rfft, rfftfreq
+from scipy.signal import get_window
+from magprime.algorithms.spectral.LikelihoodRatio import LikelihoodRatioStream
+
+def stream_spectrogram(source, fs=1.0, nperseg=256, noverlap=None, window='hann', detrend=False,
+                       block_columns=256, sum_axes=False, workers=None):
+    """
+    Computes a power spectral density spectrogram block by block.
+
+    Frames are cut from a carry-over buffer, so chunk boundaries are invisible: the
+    concatenated blocks equal scipy.signal.spectrogram(x, fs, window, nperseg, noverlap,
+    detrend=detrend, scaling='density', mode='psd') of the whole record.
+
+    Parameters:
+    - source: Array of shape (..., n_samples), e.g. load_crm_data() of shape (3, n), or an
+      iterable of such chunks along the last axis.
+    - fs: Sampling rate in Hz.
+    - nperseg: Frame length in samples.
+    - noverlap: Overlap between frames in samples (default: nperseg // 2).
+    - window: Window specification for scipy.signal.get_window; windows are cached.
+    - detrend: False or 'constant' (remove each frame's mean).
+    - block_columns: Approximate number of spectrogram columns per block for array sources.
+    - sum_axes: Sum the power over the leading axes (e.g. total power of the three components).
+    - workers: Number of threads used by the rFFT.
+
+    Yields:
+    - power: Block of shape (..., n_frequencies, k), or (n_frequencies, k) with sum_axes.
+      Column j of the stream is centred at (j * (nperseg - noverlap) + nperseg / 2) / fs;
+      see spectrogram_frequencies for the frequency axis.
+    """
+    if noverlap is None:
+        noverlap = nperseg // 2
+    hop = nperseg - noverlap
+    if hop <= 0:
+        raise ValueError("noverlap must be smaller than nperseg.")
+    if detrend not in (False, 'constant'):
+        raise ValueError("detrend must be False or 'constant'.")
+    win = _cached_window(window, nperseg)
+    scale = 1.0 / (fs * np.sum(win * win))
+    # one-sided density: double every bin except DC and (for even nperseg) Nyquist
+    one_sided = np.full(nperseg // 2 + 1, 2.0 * scale)
+    one_sided[0] = scale
+    if nperseg % 2 == 0:
+        one_sided[-1] = scale
+
+    carry = None
+    for chunk in _iter_chunks(source, block_columns * hop):
+        chunk = np.asarray(chunk, dtype=float)
+        buffer = chunk if carry is None else np.concatenate((carry, chunk), axis=-1)
+        n_frames = (buffer.shape[-1] - nperseg) // hop + 1
+        if n_frames <= 0:
+            carry = buffer
+            continue
+
+        frames = sliding_window_view(buffer, nperseg, axis=-1)[..., ::hop, :][..., :n_frames, :]
+        if detrend == 'constant':
+            frames = frames - frames.mean(axis=-1, keepdims=True)
+        spectrum = rfft(frames * win, axis=-1, workers=workers)
+        power = np.square(spectrum.real)
+        power += np.square(spectrum.imag)
+        power *= one_sided
+        power = np.swapaxes(power, -1, -2)
+        if sum_axes and power.ndim > 2:
+            power = power.reshape((-1,) + power.shape[-2:]).sum(axis=0)
+        yield power
+
+        # keep only the samples the next frame still needs
+        carry = buffer[..., n_frames * hop:].copy()
+
+def spectrogram_frequencies(nperseg=256, fs=1.0):
+    """
+    Frequencies (Hz) of the rows of the blocks produced by stream_spectrogram.
+    """
+    return rfftfreq(nperseg, d=1.0 / fs)
+
+def detect_stream(blocks, detector='likelihood_ratio', **kwargs):
+    """
+    Runs a spectral track detector on spectrogram blocks as they are produced.
+
+    Parameters:
+    - blocks: Iterable of (n_frequencies, k) spectrogram blocks, e.g. from stream_spectrogram.
+    - detector: 'likelihood_ratio' (LikelihoodRatioStream; output lags by one column) or
+      'anomaly_tracker' (columns are independent, so each block is flagged on its own).
+    - kwargs: Passed to the detector (threshold, or window_length/nu/n_jobs).
+
+    Yields:
+    - Detection blocks whose concatenation covers every spectrogram column in order.
+    """
+    if detector == 'likelihood_ratio':
+        stream = LikelihoodRatioStream(**kwargs)
+        for block in blocks:
+            detections = stream.update(block)
+            if detections.shape[1]:
+                yield detections
+        detections = stream.flush()
+        if detections.size:
+            yield detections
+    elif detector == 'anomaly_tracker':
+        from magprime.algorithms.spectral.AnomalyTracker import anomaly_tracker
+        for block in blocks:
+            yield anomaly_tracker(block, **kwargs)
+    else:
+        raise ValueError("detector must be 'likelihood_ratio' or 'anomaly_tracker'.")
+
+@lru_cache(maxsize=16)
+def _window(window, nperseg):
+    win = get_window(window, nperseg)
+    win.setflags(write=False)
+    return win
+
+def _cached_window(window, nperseg):
+    # get_window specifications may be lists (unhashable); normalize them for the cache
+    return _window(tuple(window) if isinstance(window, list) else window, nperseg)
+
+def _iter_chunks(source, chunk_length):
+    # arrays are split into views along the last axis; anything else is iterated as is
+    if isinstance(source, np.ndarray):
+        for start in range(0, source.shape[-1], chunk_length):
+            yield source[..., start:start + chunk_length]
+    else:
+        yield from source
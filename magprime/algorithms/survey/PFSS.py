@@ -22,12 +22,23 @@
 # ║                   elementary components via fast_rsvd and inverse Hankel     ║
 # ║                   projection                                                 ║
 # ╚══════════════════════════════════════════════════════════════════════════════╝
+import os
 import numpy as np
 from scipy.linalg import svd, qr
 from scipy.signal import fftconvolve
+from scipy import fft as sp_fft
+from scipy.fft import next_fast_len
+import threading
 import warnings
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait, as_completed, FIRST_COMPLETED
 from numba import jit, prange
 
+# NumPy >= 2 FFTs accept `out`, so spectra can be written into preallocated buffers;
+# below _FFT_OUT_MIN_SIZE input elements scipy's own threading is cheaper than splitting
+_FFT_OUT = np.lib.NumpyVersion(np.__version__) >= '2.0.0'
+_FFT_OUT_MIN_SIZE = 1 << 18
+
 
 @jit(nopython=True, cache=True)
 def _hard_threshold_inplace(M, zeta):
@@ -38,19 +49,33 @@ def _hard_threshold_inplace(M, zeta):
             flat[i] = 0.0
 
 
+def _n_workers(workers):
+    """Number of threads of a scipy.fft `workers` value (negative counts back from all cores)."""
+    if workers is None:
+        return 1
+    if workers < 0:
+        return max((os.cpu_count() or 1) + 1 + workers, 1)
+    return workers
+
+
 # -----------------------------------------------------------------------------
 # OptimizedPFSS class definition
 # -----------------------------------------------------------------------------
 class OptimizedPFSS:
-    def __init__(self, use_gpu=False):
+    def __init__(self, use_gpu=False, max_cache_size=8, workers=-1):
         """
         Initialize optimized PFSS solver.
         Parameters
         ----------
         use_gpu : bool
             Whether to use GPU acceleration (requires CuPy)
+        max_cache_size : int
+            Maximum number of entries kept in each of the plan and workspace caches
+        workers : int
+            Number of threads used by the CPU FFTs (-1 uses all cores)
         """
         self.use_gpu = use_gpu
+        self.workers = workers
         if use_gpu:
             try:
                 import cupy as cp
@@ -62,9 +87,35 @@ class OptimizedPFSS:
         else:
             self.gpu_available = False
 
-        # Cache for FFT plans and workspace
-        self._fft_cache = {}
-        self._workspace_cache = {}
+        # Bounded LRU caches for FFT plans and workspace, shared by the threads
+        # reconstructing component chunks and therefore guarded by a lock
+        self.max_cache_size = max_cache_size
+        self._fft_cache = OrderedDict()
+        self._workspace_cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        # Thread pool splitting large in-place FFTs, created on first use
+        self._fft_pool = None
+
+        # Number of block-Hankel matvec/rmatvec products evaluated
+        self.n_matvecs = 0
+
+    def _cache_get(self, cache, key):
+        """Look up a cache entry and mark it as most recently used."""
+        with self._cache_lock:
+            if key not in cache:
+                return None
+            cache.move_to_end(key)
+            return cache[key]
+
+    def _cache_put(self, cache, key, value):
+        """Insert a cache entry, evicting the least recently used beyond max_cache_size."""
+        with self._cache_lock:
+            cache[key] = value
+            cache.move_to_end(key)
+            while len(cache) > self.max_cache_size:
+                cache.popitem(last=False)
+        return value
 
     def _get_array_module(self, X):
         """Get appropriate array module (numpy or cupy)."""
@@ -72,67 +123,182 @@ class OptimizedPFSS:
             return self.cp
         return np
 
-    def _cached_fft_handles(self, X):
-        """Build FFT handles with caching for repeated use."""
-        P, Q = X.shape
-        cache_key = (P, Q, type(X).__name__)
-        if cache_key in self._fft_cache:
-            return self._fft_cache[cache_key]
+    def _operator_plan(self, P, Q, dtype, xp, n_channels=1):
+        """
+        Shape-keyed plan of the block-Hankel operator: Hankel dimensions, FFT sizes
+        padded to the next fast length and the padded buffers for the reversed windows.
+        """
+        cache_key = (n_channels, P, Q, np.dtype(dtype).str, xp.__name__)
+        plan = self._cache_get(self._fft_cache, cache_key)
+        if plan is not None:
+            return plan
 
-        xp = self._get_array_module(X)
         K = (P + 1) // 2
         L = P - K + 1
         Kh = (Q + 1) // 2
         Lh = Q - Kh + 1
         s0, s1 = P + L - 1, Q + Lh - 1
+        f0, f1 = next_fast_len(s0, real=True), next_fast_len(s1, real=True)
 
-        workspace = {
-            'Xpad': xp.zeros((s0, s1), dtype=X.dtype),
-            'Wpad_buffer': None,
-            'conv_buffer': None
+        plan = {
+            'dims': (K, L, Kh, Lh, s0, s1),
+            'n_channels': n_channels,
+            'fft_shape': (f0, f1),
+            'Wpad_buffer': None,    # (ncols, f0, f1) reversed right windows for matvec
+            'Vpad_buffer': None,    # (n_channels, ncols, f0, f1) reversed left windows for rmatvec
+            'Wfft_buffer': None,    # (ncols, f0, f1//2+1) window spectra for matvec
+            'Wprod_buffer': None,   # (n_channels, ncols, f0, f1//2+1) channel products for matvec
+            'Vfft_buffer': None     # (n_channels, ncols, f0, f1//2+1) window spectra for rmatvec
         }
+        return self._cache_put(self._fft_cache, cache_key, plan)
+
+    def _rfft2(self, xp, a, shape, out=None):
+        """
+        Real 2-D FFT over the last two axes, multi-threaded on the CPU. With `out`
+        (NumPy >= 2 on the CPU, at least _FFT_OUT_MIN_SIZE elements) the spectrum is
+        written into it, split over axis -3 between the solver's worker threads;
+        otherwise a new array is returned.
+        """
+        if xp is not np:
+            return xp.fft.rfft2(a, s=shape)
+        if out is None or not _FFT_OUT or a.size < _FFT_OUT_MIN_SIZE:
+            return sp_fft.rfft2(a, s=shape, workers=self.workers)
+
+        def _transform(bounds):
+            lo, hi = bounds
+            np.fft.rfftn(a[..., lo:hi, :, :], s=shape, axes=(-2, -1), out=out[..., lo:hi, :, :])
+
+        n_workers = _n_workers(self.workers)
+        n_threads = min(n_workers, a.shape[-3])
+        if n_threads == 1:
+            _transform((0, a.shape[-3]))
+            return out
+        if self._fft_pool is None:
+            self._fft_pool = ThreadPoolExecutor(max_workers=n_workers)
+        edges = np.linspace(0, a.shape[-3], n_threads + 1).astype(int)
+        list(self._fft_pool.map(_transform, zip(edges[:-1], edges[1:])))
+        return out
+
+    def _irfft2(self, xp, a, shape):
+        """Inverse real 2-D FFT over the last two axes, overwriting the input on the CPU."""
+        if xp is np:
+            return sp_fft.irfft2(a, s=shape, workers=self.workers, overwrite_x=True)
+        return xp.fft.irfft2(a, s=shape)
+
+    def _cached_fft_handles(self, X):
+        """
+        Build matvec/rmatvec handles of the block-Hankel operator of X. The plan is
+        shared between calls with the same shape; the spectrum of X is computed once
+        here and bound to the returned handles.
+
+        A stack of channels X (C, P, Q) gives the block-Hankel-of-channels operator
+        [H_1; ...; H_C], whose rows are channel-major. The channels share the right
+        windows, so one window FFT serves all channels in matvec and the rmatvec
+        products are summed in the frequency domain before a single inverse FFT.
+        The returned dims then report C*K row blocks.
+        """
+        P, Q = X.shape[-2:]
+        C = 1 if X.ndim == 2 else X.shape[0]
+        xp = self._get_array_module(X)
+        plan = self._operator_plan(P, Q, X.dtype, xp, n_channels=C)
+        K, L, Kh, Lh, s0, s1 = plan['dims']
+        fft_shape = plan['fft_shape']
+        X_fft = self._rfft2(xp, X.reshape(C, P, Q), fft_shape)
+
+        spectrum_shape = (fft_shape[0], fft_shape[1] // 2 + 1)
+        spectrum_dtype = xp.result_type(X.dtype, xp.complex64)
+
+        def _window_buffer(name, shape, tail=fft_shape, dtype=X.dtype):
+            # Only the top-left window block is ever written, so the zero padding
+            # of a freshly allocated buffer stays valid across calls
+            ncols = shape[-1]
+            if plan[name] is None or plan[name].shape[-3] < ncols:
+                plan[name] = xp.zeros(shape[:-1] + (ncols,) + tail, dtype=dtype)
+            return plan[name][..., :ncols, :, :]
+
+        def _spectrum_buffer(name, shape, fft_out=False):
+            # FFT outputs are only preallocated where _rfft2 writes into them
+            if fft_out and not (xp is np and _FFT_OUT and np.prod(shape) * fft_shape[0] * fft_shape[1] >= _FFT_OUT_MIN_SIZE):
+                return None
+            return _window_buffer(name, shape, spectrum_shape, spectrum_dtype)
 
         def matvec(Omega):
+            self.n_matvecs += 1
             ncols = Omega.shape[1]
-            if workspace['Wpad_buffer'] is None or workspace['Wpad_buffer'].shape[2] < ncols:
-                workspace['Wpad_buffer'] = xp.zeros((s0, s1, ncols), dtype=X.dtype)
-                workspace['conv_buffer'] = xp.zeros((s0, s1, ncols), dtype=xp.complex128)
-            Wpad = workspace['Wpad_buffer'][:, :, :ncols]
-            Wpad.fill(0)
+            Wpad = _window_buffer('Wpad_buffer', (ncols,))
             W3 = Omega.reshape(L, Lh, ncols, order='F')
-            Wpad[:L, :Lh, :] = W3[::-1, ::-1, :]
-            workspace['Xpad'][:P, :Q] = X
-            X_fft = xp.fft.fft2(workspace['Xpad'])
-            W_fft = xp.fft.fft2(Wpad, axes=(0, 1))
-            conv_out = xp.fft.ifft2(X_fft[:, :, None] * W_fft, axes=(0, 1)).real
-            valid_block = conv_out[L-1:P, Lh-1:Q, :]
-            return valid_block.reshape(K * Kh, ncols, order='F')
+            Wpad[:, :L, :Lh] = W3[::-1, ::-1, :].transpose(2, 0, 1)
+            W_fft = self._rfft2(xp, Wpad, fft_shape, out=_spectrum_buffer('Wfft_buffer', (ncols,), fft_out=True))
+            if C == 1:
+                W_fft *= X_fft[0]
+                W_fft = W_fft[None]
+            else:
+                W_fft = xp.multiply(X_fft[:, None], W_fft[None], out=_spectrum_buffer('Wprod_buffer', (C, ncols)))
+            conv_out = self._irfft2(xp, W_fft, fft_shape)
+            valid_block = conv_out[:, :, L-1:P, Lh-1:Q]
+            # (C, ncols, K, Kh) -> rows c*K*Kh + a + K*b
+            return valid_block.transpose(0, 3, 2, 1).reshape(C * K * Kh, ncols)
 
         def rmatvec(W):
+            self.n_matvecs += 1
             ncols = W.shape[1]
-            if workspace['Wpad_buffer'] is None or workspace['Wpad_buffer'].shape[2] < ncols:
-                workspace['Wpad_buffer'] = xp.zeros((s0, s1, ncols), dtype=X.dtype)
-            Wpad = workspace['Wpad_buffer'][:, :, :ncols]
-            Wpad.fill(0)
-            W3 = W.reshape(K, Kh, ncols, order='F')
-            Wpad[:K, :Kh, :] = W3[::-1, ::-1, :]
-            workspace['Xpad'][:P, :Q] = X
-            X_fft = xp.fft.fft2(workspace['Xpad'])
-            W_fft = xp.fft.fft2(Wpad, axes=(0, 1))
-            conv_out = xp.fft.ifft2(X_fft[:, :, None] * W_fft, axes=(0, 1)).real
-            valid_block = conv_out[K-1:P, Kh-1:Q, :]
-            return valid_block.reshape(L * Lh, ncols, order='F')
-
-        handles = (matvec, rmatvec, (K, L, Kh, Lh, s0, s1), workspace)
-        self._fft_cache[cache_key] = handles
-        return handles
+            Vpad = _window_buffer('Vpad_buffer', (C, ncols))
+            W4 = W.reshape(C, Kh, K, ncols)
+            Vpad[:, :, :K, :Kh] = W4[:, ::-1, ::-1, :].transpose(0, 3, 2, 1)
+            V_fft = self._rfft2(xp, Vpad, fft_shape, out=_spectrum_buffer('Vfft_buffer', (C, ncols), fft_out=True))
+            V_fft *= X_fft[:, None]
+            # Sum the channels into the first one in place
+            for c in range(1, C):
+                V_fft[0] += V_fft[c]
+            conv_out = self._irfft2(xp, V_fft[0], fft_shape)
+            valid_block = conv_out[:, K-1:P, Kh-1:Q]
+            return valid_block.transpose(1, 2, 0).reshape(L * Lh, ncols, order='F')
+
+        return (matvec, rmatvec, (C * K, L, Kh, Lh, s0, s1), plan)
+
+    def _overlap_counts(self, P, Q):
+        """
+        Number of Hankel entries averaged into each grid point (cached by shape).
+        The 2-D count is separable: each axis contributes min(i+1, K, L, P-i).
+        """
+        cache_key = (P, Q, 'counts')
+        counts = self._cache_get(self._workspace_cache, cache_key)
+        if counts is None:
+            K, Kh = (P + 1)//2, (Q + 1)//2
+            L, Lh = P - K + 1, Q - Kh + 1
+            i, j = np.arange(P), np.arange(Q)
+            rows = np.minimum(np.minimum(i + 1, P - i), min(K, L))
+            cols = np.minimum(np.minimum(j + 1, Q - j), min(Kh, Lh))
+            counts = np.outer(rows, cols).astype(float)
+            self._cache_put(self._workspace_cache, cache_key, counts)
+        return counts
+
+    def _component_spectra(self, U, s, Vt, P, Q, start, stop):
+        """
+        Spectra s_k * F(U_k) * F(V_k) of the rank-1 Hankel terms start..stop-1, whose
+        inverse transforms are the full 2-D convolutions of the left and right windows.
+        Returns shape (C, stop-start, f0, f1//2+1); the C = rows of U / (K*Kh) channels
+        share each right window spectrum.
+        """
+        xp = self._get_array_module(U)
+        K, Kh = (P + 1)//2, (Q + 1)//2
+        L, Lh = P - K + 1, Q - Kh + 1
+        C = U.shape[0] // (K * Kh)
+        fft_shape = (next_fast_len(P, real=True), next_fast_len(Q, real=True))
+        U_chunk = U[:, start:stop].reshape(C, Kh, K, -1).transpose(0, 3, 2, 1)
+        V_chunk = Vt[start:stop].reshape(-1, L, Lh, order='F')
+        spectra = self._rfft2(xp, U_chunk, fft_shape)
+        V_fft = self._rfft2(xp, V_chunk, fft_shape)
+        V_fft *= xp.asarray(s[start:stop])[:, None, None]
+        spectra *= V_fft
+        return spectra, fft_shape
 
     def adaptive_rank_selection(self, X, max_rank=None):
         """
         Automatically determine optimal rank using spectral gap analysis.
         """
         if max_rank is None:
-            max_rank = min(X.shape) // 4
+            max_rank = min(X.shape[-2:]) // 4
         matvec, rmatvec, dims, _ = self._cached_fft_handles(X)
         U, s_vals, _ = self._randomized_svd(matvec, rmatvec, dims, rank=max_rank)
         gaps = np.diff(s_vals)
@@ -146,8 +312,13 @@ class OptimizedPFSS:
         return self._randomized_svd_fft(matvec, rmatvec, dims, rank, p, q, power_scheme)
 
 
-    def _randomized_svd_fft(self, matvec, rmatvec, dims, rank=10, p=None, q=None, power_scheme='auto'):
-        """FFT-based randomized SVD for block-Hankel matrices."""
+    def _randomized_svd_fft(self, matvec, rmatvec, dims, rank=10, p=None, q=None, power_scheme='auto',
+                            Omega_init=None):
+        """
+        FFT-based randomized SVD for block-Hankel matrices. `Omega_init` (n, c) seeds
+        the first columns of the sketch, e.g. with the previous right singular vectors
+        so that the sketch is one step of subspace iteration from a warm start.
+        """
         K, L, Kh, Lh, *_ = dims
         m, n = K * Kh, L * Lh
         if p is None:
@@ -156,6 +327,9 @@ class OptimizedPFSS:
             q = 2 if (power_scheme == 'auto' and rank < min(m, n) // 4) else 1
         ell = min(rank + p, min(m, n))
         Omega = self._generate_structured_random_matrix(n, ell)
+        if Omega_init is not None:
+            n_init = min(Omega_init.shape[1], ell)
+            Omega[:, :n_init] = Omega_init[:, :n_init]
         Y = matvec(Omega)
         if power_scheme == 'adaptive':
             Y = self._adaptive_power_iterations(Y, matvec, rmatvec, q)
@@ -234,40 +408,48 @@ class OptimizedPFSS:
             Q_mat, _ = qr(Q_mat, mode='economic')
         return Q_mat
 
-    def _randomized_svd(self, matvec, rmatvec, dims, rank=10, p=5, q=2):
+    def _randomized_svd(self, matvec, rmatvec, dims, rank=10, p=5, q=2, Omega_init=None):
         """Legacy randomized SVD method (backward compatibility)."""
         return self._randomized_svd_fft(matvec, rmatvec, dims,
                                         rank=rank, p=p, q=q,
-                                        power_scheme='auto')
+                                        power_scheme='auto', Omega_init=Omega_init)
 
-    def fast_inverse_block_hankel_vectorized(self, U, s, Vt, P, Q):
-        """Optimized inverse block Hankel with vectorized operations."""
+    def fast_inverse_block_hankel_vectorized(self, U, s, Vt, P, Q, chunk_size=8):
+        """
+        Optimized inverse block Hankel: the rank-1 terms are summed in the frequency
+        domain in chunks of `chunk_size` ranks, followed by a single inverse FFT.
+        Returns (P, Q), or (C, P, Q) when U holds the row blocks of C channels.
+        """
         xp = self._get_array_module(U)
-        block_rows = (P + 1) // 2
-        block_cols = P - block_rows + 1
-        grid_cols = (Q + 1) // 2
-        grid_rows = Q - grid_cols + 1
-        if not hasattr(self, '_counts_cache') or self._counts_cache[0] != (P, Q):
-            counts = fftconvolve(
-                np.ones((block_rows, grid_cols)),
-                np.ones((block_cols, grid_rows)),
-                mode="full"
-            )
-            self._counts_cache = ((P, Q), counts)
-        else:
-            counts = self._counts_cache[1]
-        U_reshaped = U.reshape(block_rows, grid_cols, -1, order='F')
-        V_reshaped = Vt.reshape(-1, block_cols, grid_rows, order='F')
-        X_acc = xp.zeros((P, Q))
-        for k in range(len(s)):
-            conv_result = fftconvolve(U_reshaped[:,:,k], V_reshaped[k], mode="full")
-            X_acc += s[k] * conv_result
-        return X_acc / counts
+        counts = self._overlap_counts(P, Q)
+        X_fft = None
+        for i in range(0, len(s), chunk_size):
+            spectra, fft_shape = self._component_spectra(U, s, Vt, P, Q, i, i + chunk_size)
+            if X_fft is None:
+                X_fft = spectra.sum(axis=1)
+            else:
+                X_fft += spectra.sum(axis=1)
+        C = U.shape[0] // (((P + 1)//2) * ((Q + 1)//2))
+        shape = (P, Q) if C == 1 else (C, P, Q)
+        if X_fft is None:
+            return xp.zeros(shape)
+        X_acc = self._irfft2(xp, X_fft, fft_shape)[:, :P, :Q]
+        return (X_acc / counts).reshape(shape)
 
     def pfss_optimized(self, X, r_max=None, beta=0.8, max_iter=10, eps=1e-4,
-                      adaptive_threshold=True, early_stopping=True, verbose=False):
-        """Optimized PFSS with multiple acceleration techniques."""
-        P, Q = X.shape
+                      adaptive_threshold=True, early_stopping=True, verbose=False,
+                      warm_start=False):
+        """
+        Optimized PFSS with multiple acceleration techniques.
+        X may be a single grid (P, Q) or a stack of channels (C, P, Q) that are
+        decomposed jointly through the block-Hankel-of-channels operator.
+        With warm_start=True every randomized SVD is seeded with the right singular
+        vectors of the previous one and skips the power iterations (subspace
+        iteration carried across PFSS iterations and target ranks), and the
+        stagnation rule also ends the rank continuation: it stops after three
+        consecutive ranks that each reduce the residual by less than 1%.
+        """
+        P, Q = X.shape[-2:]
         xp = self._get_array_module(X)
         if r_max is None:
             r_max = self.adaptive_rank_selection(X)
@@ -281,14 +463,22 @@ class OptimizedPFSS:
         _hard_threshold_inplace(X_sparse, zeta0)
         prev_residual_norm = np.inf
         stagnation_count = 0
+        Vt_prev = None
+        prev_rank_residual = np.inf
+        rank_stagnation_count = 0
         for k in range(1, r_max+1):
             if verbose:
                 print(f"\n-- Target rank k = {k}")
             converged = False
             for t in range(max_iter):
-                residual = X - X_low
+                residual = X - X_sparse
                 matvec_res, rmatvec_res, _, _ = self._cached_fft_handles(residual)
-                U, s_vals, Vt = self._randomized_svd(matvec_res, rmatvec_res, dims, rank=min(k+2, r_max+1))
+                if warm_start and Vt_prev is not None:
+                    U, s_vals, Vt = self._randomized_svd(matvec_res, rmatvec_res, dims, rank=min(k+2, r_max+1),
+                                                         q=0, Omega_init=Vt_prev.T)
+                else:
+                    U, s_vals, Vt = self._randomized_svd(matvec_res, rmatvec_res, dims, rank=min(k+2, r_max+1))
+                Vt_prev = Vt
                 if len(s_vals) <= k:
                     break
                 if adaptive_threshold and k < len(s_vals):
@@ -296,7 +486,7 @@ class OptimizedPFSS:
                     zeta = beta * s_vals[k] * (1 + gap_ratio)
                 else:
                     zeta = beta * s_vals[k] if k<len(s_vals) else beta*s_vals[-1]
-                X_low_new = self.fast_inverse_block_hankel_vectorized(U[:,:k], s_vals[:k], Vt[:k,:], P, Q)
+                X_low_new = self.fast_inverse_block_hankel_vectorized(U[:,:k], s_vals[:k], Vt[:k,:], P, Q).reshape(X.shape)
                 X_sparse_new = X - X_low_new
                 _hard_threshold_inplace(X_sparse_new, zeta)
                 delta = np.linalg.norm(X_low_new - X_low)
@@ -318,6 +508,17 @@ class OptimizedPFSS:
                 X_low, X_sparse = X_low_new, X_sparse_new
                 if converged:
                     break
+            if warm_start and early_stopping:
+                rank_residual = np.linalg.norm(X - X_low - X_sparse)
+                if (prev_rank_residual - rank_residual) < 0.01 * prev_rank_residual:
+                    rank_stagnation_count += 1
+                    if rank_stagnation_count >= 3:
+                        if verbose:
+                            print(f"Rank continuation stopped at rank {k}")
+                        break
+                else:
+                    rank_stagnation_count = 0
+                prev_rank_residual = rank_residual
             if early_stopping and k>2:
                 current_error = np.linalg.norm(X - X_low - X_sparse)
                 if current_error/np.linalg.norm(X)<0.01:
@@ -327,9 +528,19 @@ class OptimizedPFSS:
         X_sparse = X - X_low
         return X_low, X_sparse
 
-    def ssa_optimized(self, X, r_max=None, sort_components=True, batch_reconstruct=True):
-        """Optimized Singular Spectrum Analysis with vectorized reconstruction."""
-        P, Q = X.shape
+    def ssa_optimized(self, X, r_max=None, sort_components=True, batch_reconstruct=True,
+                      out=None, lazy=False, n_jobs=1):
+        """
+        Optimized Singular Spectrum Analysis with vectorized reconstruction.
+        X may be a single grid (P, Q), giving components (r, P, Q), or a stack of
+        channels (C, P, Q) sharing one decomposition, giving components (r, C, P, Q).
+
+        Instead of one dense array the components can be written into a caller
+        supplied array `out` (e.g. an np.memmap of that shape), or yielded one at a
+        time with lazy=True. Chunks of components are reconstructed by `n_jobs`
+        threads.
+        """
+        P, Q = X.shape[-2:]
         xp = self._get_array_module(X)
         if r_max is None:
             r_max = self.adaptive_rank_selection(X, max_rank=min(P,Q)//3)
@@ -338,47 +549,72 @@ class OptimizedPFSS:
         if sort_components:
             idx = np.argsort(-s)
             s, U, Vt = s[idx], U[:,idx], Vt[idx,:]
-        if batch_reconstruct:
-            comps = self._batch_reconstruct_components(U, s, Vt, P, Q)
-        else:
-            comps = self._individual_reconstruct_components(U, s, Vt, P, Q)
-        return comps
+        return self.ssa_from_svd_optimized(U, s, Vt, X.shape, batch_reconstruct=batch_reconstruct,
+                                           out=out, lazy=lazy, n_jobs=n_jobs)
+
+    def _reconstruct_chunk(self, U, s, Vt, P, Q, start, stop):
+        """SSA components start..stop-1 as an array (stop-start, C, P, Q)."""
+        xp = self._get_array_module(U)
+        counts = self._overlap_counts(P, Q)
+        spectra, fft_shape = self._component_spectra(U, s, Vt, P, Q, start, stop)
+        chunk = self._irfft2(xp, spectra, fft_shape)[..., :P, :Q].transpose(1, 0, 2, 3)
+        chunk /= counts
+        return chunk
+
+    def _iter_component_chunks(self, U, s, Vt, P, Q, chunk_size=8, n_jobs=1):
+        """
+        Yield (start, stop, components) chunks in order. With n_jobs > 1 the chunks
+        are reconstructed by a thread pool (the FFTs release the GIL) with at most
+        n_jobs chunks in flight, which bounds the memory held at once.
+        """
+        bounds = [(i, min(i + chunk_size, len(s))) for i in range(0, len(s), chunk_size)]
+        if n_jobs == 1:
+            for start, stop in bounds:
+                yield start, stop, self._reconstruct_chunk(U, s, Vt, P, Q, start, stop)
+            return
+        with ThreadPoolExecutor(max_workers=n_jobs) as pool:
+            pending = deque()
+            for start, stop in bounds:
+                if len(pending) >= n_jobs:
+                    done_start, done_stop, future = pending.popleft()
+                    yield done_start, done_stop, future.result()
+                pending.append((start, stop, pool.submit(self._reconstruct_chunk, U, s, Vt, P, Q, start, stop)))
+            while pending:
+                done_start, done_stop, future = pending.popleft()
+                yield done_start, done_stop, future.result()
 
-    def _batch_reconstruct_components(self, U, s, Vt, P, Q):
-        """Batch reconstruction of all SSA components."""
+    def _batch_reconstruct_components(self, U, s, Vt, P, Q, chunk_size=8, out=None, n_jobs=1):
+        """
+        Batch reconstruction of all SSA components, `chunk_size` ranks per FFT batch,
+        written into `out` when given. `out` may be any array or view of shape
+        (r, P, Q), or (r, C, P, Q) for C channels; it is filled by slice assignment.
+        """
         xp = self._get_array_module(U)
         r = len(s)
-        K, Kh = (P + 1)//2, (Q + 1)//2
-        L, Lh = P - K + 1, Q - Kh + 1
-        cache_key = (P,Q,'ssa_counts')
-        if cache_key not in self._workspace_cache:
-            counts = fftconvolve(np.ones((K,Kh)), np.ones((L,Lh)), mode='full')
-            self._workspace_cache[cache_key] = counts
-        else:
-            counts = self._workspace_cache[cache_key]
-        U_batch = U.reshape(K,Kh,r,order='F')
-        V_batch = Vt.reshape(r,L,Lh,order='F')
-        comps = xp.zeros((r,P,Q),dtype=U.dtype)
-        chunk_size = min(8, r)
-        for i in range(0,r,chunk_size):
-            end_idx = min(i+chunk_size, r)
-            for k in range(i,end_idx):
-                conv_result = fftconvolve(U_batch[:,:,k], V_batch[k], mode='full')
-                comps[k] = s[k]*conv_result/ counts
+        C = U.shape[0] // (((P + 1)//2) * ((Q + 1)//2))
+        shape = (r, P, Q) if C == 1 else (r, C, P, Q)
+        if out is not None and out.shape != shape:
+            raise ValueError(f"out has shape {out.shape}, expected {shape}.")
+        comps = xp.zeros(shape, dtype=U.dtype) if out is None else out
+        for start, stop, chunk in self._iter_component_chunks(U, s, Vt, P, Q, chunk_size, n_jobs):
+            comps[start:stop] = chunk[:, 0] if C == 1 else chunk
+        if isinstance(comps, np.memmap):
+            comps.flush()
         return comps
 
+    def _lazy_reconstruct_components(self, U, s, Vt, P, Q, chunk_size=8, n_jobs=1):
+        """Yield SSA components one at a time, (P, Q) or (C, P, Q) each."""
+        for _, _, chunk in self._iter_component_chunks(U, s, Vt, P, Q, chunk_size, n_jobs):
+            for comp in chunk:
+                yield comp[0] if comp.shape[0] == 1 else comp
+
     def _individual_reconstruct_components(self, U, s, Vt, P, Q):
         """Individual component reconstruction (fallback)."""
         xp = self._get_array_module(U)
         r = len(s)
         K, Kh = (P + 1)//2, (Q + 1)//2
         L, Lh = P - K + 1, Q - Kh + 1
-        cache_key = (P,Q,'ssa_counts')
-        if cache_key not in self._workspace_cache:
-            counts = fftconvolve(np.ones((K,Kh)), np.ones((L,Lh)), mode='full')
-            self._workspace_cache[cache_key] = counts
-        else:
-            counts = self._workspace_cache[cache_key]
+        counts = self._overlap_counts(P, Q)
         comps = xp.zeros((r,P,Q),dtype=U.dtype)
         for k in range(r):
             Uk = U[:,k].reshape(K,Kh,order='F')
@@ -386,11 +622,13 @@ class OptimizedPFSS:
             comps[k] = s[k]*fftconvolve(Uk, Vk, mode='full')/ counts
         return comps
 
-    def ssa_from_svd_optimized(self, U, s, Vt, shape, batch_reconstruct=True):
-        """Optimized SSA reconstruction from existing SVD."""
-        P,Q = shape
-        if batch_reconstruct:
-            return self._batch_reconstruct_components(U, s, Vt, P, Q)
+    def ssa_from_svd_optimized(self, U, s, Vt, shape, batch_reconstruct=True, out=None, lazy=False, n_jobs=1):
+        """Optimized SSA reconstruction from existing SVD (see ssa_optimized for out/lazy/n_jobs)."""
+        P,Q = shape[-2:]
+        if lazy:
+            return self._lazy_reconstruct_components(U, s, Vt, P, Q, n_jobs=n_jobs)
+        if batch_reconstruct or len(shape) == 3 or out is not None:
+            return self._batch_reconstruct_components(U, s, Vt, P, Q, out=out, n_jobs=n_jobs)
         else:
             return self._individual_reconstruct_components(U, s, Vt, P, Q)
 
@@ -401,14 +639,137 @@ def fast_rsvd(X, rank=10, p=1, q=1, power_scheme='auto', use_gpu=False):
     solver = OptimizedPFSS(use_gpu=use_gpu)
     return solver.fast_rsvd_optimized(X, rank, p, q, power_scheme)
 
-def pfss(X, r_max=None, beta=0.8, max_iter=10, eps=1e-4, verbose=False, use_gpu=False):
+def pfss(X, r_max=None, beta=0.8, max_iter=10, eps=1e-4, verbose=False, use_gpu=False, warm_start=False):
     solver = OptimizedPFSS(use_gpu=use_gpu)
-    return solver.pfss_optimized(X, r_max, beta, max_iter, eps, verbose=verbose)
+    return solver.pfss_optimized(X, r_max, beta, max_iter, eps, verbose=verbose, warm_start=warm_start)
 
-def ssa(X, r_max=None, sort_components=True, use_gpu=False):
+def ssa(X, r_max=None, sort_components=True, use_gpu=False, out=None, lazy=False, n_jobs=1):
     solver = OptimizedPFSS(use_gpu=use_gpu)
-    return solver.ssa_optimized(X, r_max=r_max, sort_components=sort_components)
+    return solver.ssa_optimized(X, r_max=r_max, sort_components=sort_components,
+                                out=out, lazy=lazy, n_jobs=n_jobs)
+
+def ssa_from_svd(U, s, Vt, shape, use_gpu=False, out=None, lazy=False, n_jobs=1):
+    solver = OptimizedPFSS(use_gpu=use_gpu)
+    return solver.ssa_from_svd_optimized(U, s, Vt, shape, out=out, lazy=lazy, n_jobs=n_jobs)
+
+
+# -----------------------------------------------------------------------------
+# Tiled (out-of-core) PFSS
+# -----------------------------------------------------------------------------
+def _tile_starts(n, tile, overlap):
+    """Start indices of tiles of length `tile` covering [0, n) with at least `overlap` overlap."""
+    if n <= tile:
+        return [0]
+    step = tile - overlap
+    starts = list(range(0, n - tile, step))
+    starts.append(n - tile)
+    return starts
+
+def _tile_weights(n, starts, tile, overlap):
+    """
+    1-D blending weights of each tile, linearly tapered inside the overlaps and
+    normalized so that they sum to one at every sample (partition of unity).
+    """
+    weights = []
+    total = np.zeros(n)
+    for start in starts:
+        length = min(tile, n - start)
+        w = np.ones(length)
+        ramp = np.arange(1, min(overlap, length) + 1) / (overlap + 1)
+        if start > 0:
+            w[:len(ramp)] = ramp
+        if start + length < n:
+            w[length-len(ramp):] = np.minimum(w[length-len(ramp):], ramp[::-1])
+        total[start:start+length] += w
+        weights.append(w)
+    return [w / total[start:start+len(w)] for w, start in zip(weights, starts)]
 
-def ssa_from_svd(U, s, Vt, shape, use_gpu=False):
+def _pfss_tile(tile, r_max, beta, max_iter, eps, use_gpu):
+    """Low-rank part of a single tile (runs in a worker process)."""
     solver = OptimizedPFSS(use_gpu=use_gpu)
-    return solver.ssa_from_svd_optimized(U, s, Vt, shape)
+    X_low, _ = solver.pfss_optimized(tile, r_max, beta, max_iter, eps)
+    return X_low
+
+def pfss_tiled(X, tile_shape=(256, 256), overlap=32, r_max=None, beta=0.8, max_iter=10,
+               eps=1e-4, n_jobs=1, low_path=None, sparse_path=None, use_gpu=False):
+    """
+    PFSS of survey grids larger than memory. The grid is split into overlapping
+    tiles that are decomposed independently (in parallel processes for n_jobs > 1)
+    and blended back with partition-of-unity weights, so memory is bounded by the
+    tile size and the number of tiles in flight.
+    Parameters
+    ----------
+    X : ndarray or str
+        2-D survey grid, or the path of a .npy file that is memory-mapped
+    tile_shape : tuple of int
+        Size (rows, cols) of each tile
+    overlap : int
+        Number of samples shared by neighbouring tiles
+    n_jobs : int
+        Number of worker processes (n_jobs <= 0 uses all cores)
+    low_path, sparse_path : str, optional
+        .npy files to write the low-rank and sparse grids to as memory maps;
+        in-memory arrays are returned when omitted
+    Returns
+    -------
+    X_low, X_sparse : ndarray or memmap
+    """
+    if isinstance(X, str):
+        X = np.load(X, mmap_mode='r')
+    P, Q = X.shape
+    tile_rows, tile_cols = min(tile_shape[0], P), min(tile_shape[1], Q)
+    # Only axes that are split into several tiles need an overlap
+    row_overlap = overlap if P > tile_rows else 0
+    col_overlap = overlap if Q > tile_cols else 0
+    if row_overlap >= tile_rows or col_overlap >= tile_cols:
+        raise ValueError("'overlap' must be smaller than the tile size")
+    if n_jobs <= 0:
+        n_jobs = os.cpu_count() or 1
+
+    def _output(path):
+        if path is None:
+            return np.zeros((P, Q))
+        return np.lib.format.open_memmap(path, mode='w+', dtype=np.float64, shape=(P, Q))
+    X_low = _output(low_path)
+    X_sparse = _output(sparse_path)
+
+    row_starts = _tile_starts(P, tile_rows, row_overlap)
+    col_starts = _tile_starts(Q, tile_cols, col_overlap)
+    row_weights = _tile_weights(P, row_starts, tile_rows, row_overlap)
+    col_weights = _tile_weights(Q, col_starts, tile_cols, col_overlap)
+    tiles = [(i, j) for i in range(len(row_starts)) for j in range(len(col_starts))]
+
+    def _read(i, j):
+        r0, c0 = row_starts[i], col_starts[j]
+        return np.array(X[r0:r0+tile_rows, c0:c0+tile_cols], dtype=np.float64)
+
+    def _blend(i, j, tile_low):
+        r0, c0 = row_starts[i], col_starts[j]
+        w = np.outer(row_weights[i], col_weights[j])
+        X_low[r0:r0+tile_rows, c0:c0+tile_cols] += w * tile_low
+
+    args = (r_max, beta, max_iter, eps, use_gpu)
+    if n_jobs == 1:
+        for i, j in tiles:
+            _blend(i, j, _pfss_tile(_read(i, j), *args))
+    else:
+        # Keep at most 2 * n_jobs tiles in flight to bound memory
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            pending = {}
+            for i, j in tiles:
+                if len(pending) >= 2 * n_jobs:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        _blend(*pending.pop(future), future.result())
+                pending[pool.submit(_pfss_tile, _read(i, j), *args)] = (i, j)
+            for future in as_completed(pending):
+                _blend(*pending[future], future.result())
+
+    # Sparse part row block by row block
+    for r0 in range(0, P, tile_rows):
+        X_sparse[r0:r0+tile_rows] = X[r0:r0+tile_rows] - X_low[r0:r0+tile_rows]
+
+    for out in (X_low, X_sparse):
+        if isinstance(out, np.memmap):
+            out.flush()
+    return X_low, X_sparse
@@ -1,3 +1,3 @@
-from .thinshell import thinshell
+from .thinshell import thinshell, thinshell_batch, StreamingThinShell
 
-__all__ = ['thinshell']
\ No newline at end of file
+__all__ = ['thinshell', 'thinshell_batch', 'StreamingThinShell']
\ No newline at end of file
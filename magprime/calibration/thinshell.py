@@ -1,9 +1,10 @@
+import warnings
 import numpy as np
 from scipy.optimize import least_squares
 
-__all__ = ["thinshell"]
+__all__ = ["thinshell", "thinshell_batch", "StreamingThinShell"]
 
-def thinshell(Bx, By, Bz, ref_B):
+def thinshell(Bx, By, Bz, ref_B, max_samples=None, sampling="leverage", seed=None):
     """
     Solve for:
       A      : 3×3 upper‑triangular calibration matrix
@@ -12,7 +13,27 @@ def thinshell(Bx, By, Bz, ref_B):
       angles : misalignment [phi, rho, lam] in degrees
     
     on noise‑free data so that ||A*(B - O)|| = ref_B exactly.
+
+    For very long calibration passes, `max_samples` fits on a well-conditioned
+    subset of at most that many samples so the run time no longer grows with the
+    pass length. `sampling` picks the subset:
+      "leverage" : samples drawn with probability mixing their leverage score in
+                   the linear design matrix and a uniform floor
+      "sphere"   : samples spread evenly over attitude bins on the unit sphere
+    The result then also holds "diagnostics" with the number of samples used,
+    the attitude coverage (fraction of occupied sphere bins) of the pass and of
+    the subset, and the condition number of the column-scaled design matrix.
+
+    The Huber refinement works on the residual (|A(B-O)|² - ref_B²) / (2 ref_B),
+    which is the magnitude error in nT to first order, with a 1 nT Huber scale.
     """
+    diagnostics = None
+    if max_samples is not None and len(ref_B) > max_samples:
+        B_all = np.vstack((Bx, By, Bz))
+        idx = _subsample(B_all, max_samples, sampling, np.random.default_rng(seed))
+        diagnostics = _sampling_diagnostics(B_all, idx)
+        Bx, By, Bz, ref_B = Bx[idx], By[idx], Bz[idx], ref_B[idx]
+
     # 1) INITIAL LINEAR SOLVE FOR S = AᵀA AND c = S·O → then Cholesky to get A, O
     #    build D·p = ref_B²  where p = [s0..s5, c0..c2, d]
     D = np.column_stack([
@@ -47,39 +68,359 @@ def thinshell(Bx, By, Bz, ref_B):
     a12, a13, a23 = A_init[0,1], A_init[0,2], A_init[1,2]
 
     # 2) NONLINEAR REFINEMENT OVER [s1,s2,s3, a12,a13,a23, O0,O1,O2]
-    def resid(params, Bx, By, Bz, ref_B):
-        s1,s2,s3,a12,a13,a23,O0,O1,O2 = params
-        A = np.array([[s1, a12, a13],
-                      [0. , s2 , a23],
-                      [0. , 0. , s3 ]])
-        X = np.vstack((Bx - O0, By - O1, Bz - O2))
-        magsq = np.sum((A @ X)**2, axis=0)
-        return magsq - ref_B**2
-
     # pack initial guess
     x0 = np.array([
         g0, g1, g2,          # s1,s2,s3
         a12, a13, a23,       # off‑diagonals
         *O_init              # O0,O1,O2
     ])
-    sol = least_squares(resid, x0, args=(Bx,By,Bz,ref_B), loss='huber',
-                        xtol=1e-15, ftol=1e-15, gtol=1e-15)
-    
+    params = _refine(np.vstack((Bx, By, Bz)), ref_B, x0)
 
-    s1_, s2_, s3_, a12_, a13_, a23_, O0, O1, O2 = sol.x
-    A = np.array([[s1_, a12_, a13_],
-                  [0.  , s2_ , a23_],
-                  [0.  , 0.  , s3_ ]])
-    O = np.array([O0, O1, O2])
+    result = _unpack(params[None], squeeze=True)
+    if diagnostics is not None:
+        result["diagnostics"] = diagnostics
+    return result
 
-    phi = np.degrees( np.arctan2(  A[0,1],   A[1,1] ) )   # true v12
-    rho = np.degrees( np.arctan2(  A[0,2],   A[2,2] ) )   # true v13
-    lam = np.degrees( np.arctan2(  A[1,2],   A[2,2] ) )   # true v23
-    angles = np.array([phi, rho, lam])
-    
+
+def thinshell_batch(Bx, By, Bz, ref_B, max_iter=100, tol=1e-10, f_scale=1.0):
+    """
+    Solve many independent thin-shell calibrations at once, e.g. several sensors
+    or a sliding window over an orbit, to track calibration drift.
+
+    Bx, By, Bz, ref_B have shape (n_cal, n_samples); every row is one calibration.
+    The linear stage is a batched QR solve and the refinement a vectorized
+    Levenberg-Marquardt with the analytic Jacobian and Huber weights (the loss
+    used by thinshell), so all calibrations advance together in NumPy.
+    Residuals are magnitude errors in nT as in thinshell, so `f_scale` is in nT.
+
+    A calibration stops when an accepted step lowers its cost by less than `tol`
+    (relative), its step becomes negligible, or no damped step can lower its cost.
+    A warning is issued when calibrations are still running after `max_iter`.
+
+    Returns the same keys as thinshell with a leading n_cal axis, plus
+      cost      : final Huber cost per calibration
+      n_iter    : Levenberg-Marquardt iterations per calibration
+      converged : whether each calibration stopped before `max_iter`
+    """
+    B = np.stack((Bx, By, Bz), axis=1).astype(float)       # (n_cal, 3, n_samples)
+    ref_B = np.asarray(ref_B, dtype=float)                  # (n_cal, n_samples)
+    n_cal, _, n_samples = B.shape
+
+    # 1) BATCHED LINEAR SOLVE
+    D = _design_matrix(B)
+    Qd, Rd = np.linalg.qr(D)
+    p = np.linalg.solve(Rd, np.einsum('nmk,nm->nk', Qd, ref_B**2)[..., None])[..., 0]
+    del D, Qd
+    params = _linear_params(p)
+
+    # 2) BATCHED LEVENBERG-MARQUARDT WITH HUBER WEIGHTS (IRLS)
+    X = np.empty_like(B)
+    Y = np.empty_like(B)
+    X_try = np.empty_like(B)
+    Y_try = np.empty_like(B)
+    J = np.empty((n_cal, n_samples, 9))
+    r = _residual(params, B, ref_B, X, Y)
+    cost = _huber_cost(r, f_scale)
+    damping = np.full(n_cal, 1e-3)
+    active = np.ones(n_cal, dtype=bool)
+    n_iter = np.zeros(n_cal, dtype=int)
+    for _ in range(max_iter):
+        if not active.any():
+            break
+        _jacobian(params, X, Y, ref_B, J)
+        abs_r = np.abs(r)
+        w = np.where(abs_r <= f_scale, 1.0, f_scale / np.maximum(abs_r, f_scale))
+        JtW = J.transpose(0, 2, 1) * w[:, None, :]
+        H = JtW @ J
+        g = np.einsum('nkm,nm->nk', JtW, r)
+        diag = np.einsum('nkk->nk', H)
+        step = -np.linalg.solve(H + (damping[:, None] * diag)[:, :, None] * np.eye(9),
+                                g[..., None])[..., 0]
+        step[~active] = 0
+
+        trial = params + step
+        r_try = _residual(trial, B, ref_B, X_try, Y_try)
+        cost_try = _huber_cost(r_try, f_scale)
+        accept = active & (cost_try < cost)
+
+        params[accept] = trial[accept]
+        r[accept], X[accept], Y[accept] = r_try[accept], X_try[accept], Y_try[accept]
+        rel_change = (cost - cost_try) / np.maximum(cost, np.finfo(float).tiny)
+        cost[accept] = cost_try[accept]
+        damping = np.where(accept, damping / 3, np.where(active, damping * 4, damping))
+        n_iter[active] += 1
+
+        small_step = np.linalg.norm(step, axis=1) <= tol * (np.linalg.norm(params, axis=1) + tol)
+        active &= ~((accept & (rel_change < tol)) | small_step | (damping > 1e12))
+
+    if active.any():
+        warnings.warn(f"thinshell_batch: {active.sum()} of {n_cal} calibrations did not "
+                      f"converge in max_iter={max_iter} iterations", RuntimeWarning)
+
+    result = _unpack(params)
+    result["cost"] = cost
+    result["n_iter"] = n_iter
+    result["converged"] = ~active
+    return result
+
+
+class StreamingThinShell:
+    def __init__(self, tol=1e-5, offset_tol=0.1, buffer_size=10000, forgetting=1.0):
+        """
+        Recursive least-squares thin-shell calibration for continuous in-flight use.
+        The linear stage keeps only the 9x9 normal-equation accumulators, and the
+        Huber refinement runs on a fixed-size buffer of the latest samples, and only
+        when a linear gain or non-orthogonality term has moved by more than `tol`, or
+        an offset by more than `offset_tol`, since the last refinement. Once the
+        estimate has settled, an update is O(1) in the buffer size. Memory is
+        constant in the number of samples.
+        Parameters
+        ----------
+        tol : float
+            Absolute change of the gains and off-diagonal terms of A (dimensionless)
+            that triggers a refinement; 1e-5 is 0.4 nT on a 40000 nT field
+        offset_tol : float
+            Absolute change of the offsets (units of B, nT) that triggers a refinement
+        buffer_size : int
+            Number of most recent samples kept for the nonlinear refinement
+        forgetting : float
+            Exponential forgetting factor per sample in (0, 1] applied to the
+            accumulators (1 weights the whole history equally)
+        """
+        self.tol = tol
+        self.offset_tol = offset_tol
+        self.buffer_size = buffer_size
+        self.forgetting = forgetting
+        self.reset()
+
+    def reset(self):
+        """Clear the accumulators, the sample buffer and the current calibration."""
+        self.DtD = np.zeros((9, 9))             # Normal matrix  D^T D
+        self.Dty = np.zeros(9)                  # Right-hand side D^T ref_B^2
+        self.n_samples = 0
+        self.n_refinements = 0
+        self._buffer = np.empty((3, self.buffer_size))
+        self._buffer_ref = np.empty(self.buffer_size)
+        self._head = 0
+        self._count = 0
+        self._linear = None                     # Linear parameters at the last refinement
+        self.params = None                      # Current refined parameters
+
+    def _push(self, B, ref_B):
+        "Write samples into the ring buffer"
+        n = B.shape[1]
+        if n >= self.buffer_size:
+            B, ref_B, n = B[:, -self.buffer_size:], ref_B[-self.buffer_size:], self.buffer_size
+        idx = (self._head + np.arange(n)) % self.buffer_size
+        self._buffer[:, idx] = B
+        self._buffer_ref[idx] = ref_B
+        self._head = (self._head + n) % self.buffer_size
+        self._count = min(self._count + n, self.buffer_size)
+
+    def _moved(self, linear):
+        "Whether the linear solution left the gate around the last refinement"
+        change = np.abs(linear - self._linear)
+        return bool((change[:6] > self.tol).any() or (change[6:] > self.offset_tol).any())
+
+    def update(self, Bx, By, Bz, ref_B):
+        """
+        Add one or more samples and return the current calibration
+        (same keys as thinshell plus 'refined', True when the refinement ran),
+        or None while fewer than 9 samples have been seen.
+        """
+        B = np.vstack((np.atleast_1d(Bx), np.atleast_1d(By), np.atleast_1d(Bz))).astype(float)
+        ref_B = np.asarray(ref_B, dtype=float).reshape(-1)
+        n = B.shape[1]
+
+        # Accumulate the normal equations with per-sample forgetting weights
+        D = _design_matrix(B)
+        y = ref_B**2
+        if self.forgetting == 1:
+            w = np.ones(n)
+        else:
+            w = self.forgetting ** np.arange(n - 1, -1, -1, dtype=float)
+            self.DtD *= self.forgetting ** n
+            self.Dty *= self.forgetting ** n
+        self.DtD += (D.T * w) @ D
+        self.Dty += (D.T * w) @ y
+        self.n_samples += n
+        self._push(B, ref_B)
+        if self.n_samples < 9:
+            return None
+
+        # Column-scaled solve of the 9x9 normal equations
+        scale = np.sqrt(np.diag(self.DtD))
+        p = np.linalg.solve(self.DtD / np.outer(scale, scale), self.Dty / scale) / scale
+        linear = _linear_params(p[None])[0]
+
+        refined = False
+        if self._linear is None or self._moved(linear):
+            order = (self._head - self._count + np.arange(self._count)) % self.buffer_size
+            x0 = linear if self.params is None else self.params
+            self.params = _refine(self._buffer[:, order], self._buffer_ref[order], x0)
+            self._linear = linear
+            self.n_refinements += 1
+            refined = True
+
+        result = _unpack(self.params[None], squeeze=True)
+        result["refined"] = refined
+        return result
+
+
+# Equal-area attitude bins on the unit sphere: bands of equal height in z times
+# equal longitude sectors
+N_Z_BANDS = 12
+N_LON_SECTORS = 24
+
+
+def _sphere_bins(B):
+    """Equal-area unit-sphere bin index of each sample direction in B (3, m)."""
+    u = B / np.linalg.norm(B, axis=0)
+    band = np.minimum(((u[2] + 1) / 2 * N_Z_BANDS).astype(int), N_Z_BANDS - 1)
+    lon = np.arctan2(u[1], u[0])
+    sector = np.minimum(((lon + np.pi) / (2 * np.pi) * N_LON_SECTORS).astype(int), N_LON_SECTORS - 1)
+    return band * N_LON_SECTORS + sector
+
+
+def _subsample(B, n, sampling, rng):
+    """Indices (sorted) of a subset of n samples of B (3, m)."""
+    m = B.shape[1]
+    if sampling == "leverage":
+        # Leverage scores are the squared row norms of Q in D = QR
+        Q, _ = np.linalg.qr(_design_matrix(B))
+        leverage = np.einsum('mk,mk->m', Q, Q)
+        prob = 0.5 * leverage / leverage.sum() + 0.5 / m
+        idx = rng.choice(m, size=n, replace=False, p=prob)
+    elif sampling == "sphere":
+        # Random order within each attitude bin, then take the first samples of
+        # every bin round-robin until n are chosen
+        bins = _sphere_bins(B)
+        order = np.lexsort((rng.random(m), bins))
+        sorted_bins = bins[order]
+        first = np.searchsorted(sorted_bins, sorted_bins, side='left')
+        rank_in_bin = np.arange(m) - first
+        idx = order[np.argsort(rank_in_bin, kind='stable')[:n]]
+    else:
+        raise ValueError("'sampling' must be 'leverage' or 'sphere'")
+    return np.sort(idx)
+
+
+def _sampling_diagnostics(B, idx):
+    """Coverage and conditioning of the subset idx of B (3, m)."""
+    n_bins = N_Z_BANDS * N_LON_SECTORS
+    D = _design_matrix(B[:, idx])
+    D /= np.linalg.norm(D, axis=0)
     return {
+        "n_samples":       B.shape[1],
+        "n_used":          len(idx),
+        "coverage_pass":   len(np.unique(_sphere_bins(B))) / n_bins,
+        "coverage_subset": len(np.unique(_sphere_bins(B[:, idx]))) / n_bins,
+        "condition":       np.linalg.cond(D)
+    }
+
+
+def _design_matrix(B):
+    """Design matrix (..., m, 9) of the linear model D·p = ref_B² for B (..., 3, m)."""
+    D = np.empty(B.shape[:-2] + (B.shape[-1], 9))
+    Bx, By, Bz = B[..., 0, :], B[..., 1, :], B[..., 2, :]
+    D[..., 0] = Bx*Bx
+    D[..., 1] = By*By
+    D[..., 2] = Bz*Bz
+    D[..., 3] = 2*Bx*By
+    D[..., 4] = 2*Bx*Bz
+    D[..., 5] = 2*By*Bz
+    D[..., 6] = -2*Bx
+    D[..., 7] = -2*By
+    D[..., 8] = -2*Bz
+    return D
+
+
+def _linear_params(p):
+    """Initial [s1,s2,s3, a12,a13,a23, O0,O1,O2] (n, 9) from linear solutions p (n, 9)."""
+    n = p.shape[0]
+    S = p[:, [0, 3, 4, 3, 1, 5, 4, 5, 2]].reshape(n, 3, 3)
+    O_init = np.linalg.solve(S, p[:, 6:9, None])[..., 0]
+    A_init = np.linalg.cholesky(S).transpose(0, 2, 1)
+    return np.column_stack([A_init[:, 0, 0], A_init[:, 1, 1], A_init[:, 2, 2],
+                            A_init[:, 0, 1], A_init[:, 0, 2], A_init[:, 1, 2], O_init])
+
+
+def _refine(B, ref_B, x0, f_scale=1.0):
+    """
+    Huber least-squares refinement of one calibration from x0 with the analytic
+    Jacobian; residual and Jacobian share preallocated buffers.
+    """
+    X = np.empty_like(B)
+    Y = np.empty_like(B)
+    J = np.empty((B.shape[1], 9))
+
+    def resid(params):
+        return _residual(params[None], B[None], ref_B[None], X[None], Y[None])[0]
+
+    def jac(params):
+        _residual(params[None], B[None], ref_B[None], X[None], Y[None])
+        _jacobian(params[None], X[None], Y[None], ref_B[None], J[None])
+        return J
+
+    sol = least_squares(resid, x0, jac=jac, loss='huber', f_scale=f_scale,
+                        xtol=1e-15, ftol=1e-15, gtol=1e-15)
+    return sol.x
+
+
+def _residual(params, B, ref_B, X, Y):
+    """
+    Batched residual (|A (B - O)|^2 - ref_B^2) / (2 ref_B), the magnitude error to
+    first order, filling X = B - O and Y = A X in place.
+    params: (n, 9), B: (n, 3, m), ref_B: (n, m) -> (n, m)
+    """
+    s1, s2, s3, a12, a13, a23 = (params[:, i, None] for i in range(6))
+    np.subtract(B, params[:, 6:9, None], out=X)
+    Y[:, 0] = s1*X[:, 0] + a12*X[:, 1] + a13*X[:, 2]
+    Y[:, 1] = s2*X[:, 1] + a23*X[:, 2]
+    Y[:, 2] = s3*X[:, 2]
+    return (np.einsum('nkm,nkm->nm', Y, Y) - ref_B*ref_B) / (2*ref_B)
+
+
+def _jacobian(params, X, Y, ref_B, J):
+    """Batched analytic Jacobian (n, m, 9) of _residual, given its X and Y."""
+    s1, s2, s3, a12, a13, a23 = (params[:, i, None] for i in range(6))
+    J[..., 0] = Y[:, 0]*X[:, 0]
+    J[..., 1] = Y[:, 1]*X[:, 1]
+    J[..., 2] = Y[:, 2]*X[:, 2]
+    J[..., 3] = Y[:, 0]*X[:, 1]
+    J[..., 4] = Y[:, 0]*X[:, 2]
+    J[..., 5] = Y[:, 1]*X[:, 2]
+    J[..., 6] = -s1*Y[:, 0]
+    J[..., 7] = -(a12*Y[:, 0] + s2*Y[:, 1])
+    J[..., 8] = -(a13*Y[:, 0] + a23*Y[:, 1] + s3*Y[:, 2])
+    J /= ref_B[..., None]
+    return J
+
+
+def _huber_cost(r, f_scale):
+    """Huber cost per calibration, matching least_squares(loss='huber')."""
+    z = (r / f_scale)**2
+    rho = np.where(z <= 1, z, 2*np.sqrt(z) - 1)
+    return 0.5 * f_scale**2 * np.sum(rho, axis=-1)
+
+
+def _unpack(params, squeeze=False):
+    """Calibration matrix, offsets, gains and angles from (n, 9) parameters."""
+    n = params.shape[0]
+    A = np.zeros((n, 3, 3))
+    A[:, 0, 0], A[:, 1, 1], A[:, 2, 2] = params[:, 0], params[:, 1], params[:, 2]
+    A[:, 0, 1], A[:, 0, 2], A[:, 1, 2] = params[:, 3], params[:, 4], params[:, 5]
+
+    phi = np.degrees( np.arctan2(  A[:,0,1],   A[:,1,1] ) )   # true v12
+    rho = np.degrees( np.arctan2(  A[:,0,2],   A[:,2,2] ) )   # true v13
+    lam = np.degrees( np.arctan2(  A[:,1,2],   A[:,2,2] ) )   # true v23
+
+    result = {
         "A":      A,
-        "O":      O,
-        "angles": angles,
-        "gains":  np.array([s1_, s2_, s3_])
-    }
\ No newline at end of file
+        "O":      params[:, 6:9].copy(),
+        "angles": np.column_stack([phi, rho, lam]),
+        "gains":  params[:, 0:3].copy()
+    }
+    if squeeze:
+        result = {key: value[0] for key, value in result.items()}
+    return result
\ No newline at end of file
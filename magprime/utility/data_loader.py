@@ -1,12 +1,20 @@
+import hashlib
+import json
+import os
 import numpy as np
 import pandas as pd
 import pkg_resources
 
+"Parsed copies of the bundled data files are cached as .npy files keyed on the source file's hash"
+CACHE_DIR = os.environ.get('MAGPRIME_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'magprime'))
+"Part of every cache key; bump it whenever a parser changes so stale entries are never read"
+CACHE_VERSION = 1
+
 def load_michibiki_data():
     "Import the magnetometer data from the file"
     file_path = pkg_resources.resource_filename('magprime.utility.SPACE_DATA', 'michibiki.dat')
-    qzs_1 = np.loadtxt(file_path, dtype=float, usecols=(0, 4, 5, 6, 7, 8, 9))
-    B_qzs = qzs_1.T
+    qzs_1 = _cached_array(file_path, lambda path: np.loadtxt(path, dtype=float, usecols=(0, 4, 5, 6, 7, 8, 9)))
+    B_qzs = np.array(qzs_1.T)
 
     "Subtract the bias from the magnetometer data"
     B_qzs[1] -= 60 # MAM-S1 X-Axis
@@ -25,22 +33,80 @@ def load_michibiki_data():
 def load_swarm_data(start = 160000, stop = 165000):
     "Import 50 Hz magnetometer residual data"
     file_path = pkg_resources.resource_filename('magprime.utility.SPACE_DATA', 'Swarm_MAGA_HR_20150317_0900.csv')
-    df=pd.read_csv(file_path, sep=',',header=None)
-    r = df[10]
-    swarm = np.array([np.fromstring(r[i][1:-1], dtype=float, sep=' ') for i in range(1, r.shape[0])]).T[:,start:stop]
-    return(swarm)
+    swarm = _cached_array(file_path, _parse_swarm)
+    return(np.array(swarm[:,start:stop]))
 
 def load_ruder_path():
     "Import 50 Hz magnetometer residual data"
     file_path = pkg_resources.resource_filename('magprime.utility.SPACE_DATA', 'RUDER_example_swarm.txt')
     return(file_path)
     
-def load_crm_data():
-    "Import 200 Hz magnetometer data, detrended"
+def load_crm_data(mmap=False):
+    "Import 200 Hz magnetometer data, detrended (mmap=True returns a read-only memory map of the cache)"
     file_path = pkg_resources.resource_filename('magprime.utility.SPACE_DATA', 'crm_g6_i5_t2_l2_detrended.csv')
+    crm = _cached_array(file_path, _parse_crm)
+    return(crm if mmap else np.array(crm))
+
+def _parse_swarm(file_path):
+    "Parse the bracketed vector column of the Swarm CSV into a (3, n) array in one pass"
+    df = pd.read_csv(file_path, sep=',', header=None)
+    r = df[10].iloc[1:].str.slice(1, -1)
+    values = np.array(' '.join(r).split(), dtype=float)
+    return values.reshape(len(r), -1).T
+
+def _parse_crm(file_path):
     df = pd.read_csv(file_path, sep=',', skiprows=1, header=None)
     bx = df[1].to_numpy()
     by = df[2].to_numpy()
     bz = df[3].to_numpy()
-    crm = np.stack((bx, by, bz))
-    return(crm)
+    return np.stack((bx, by, bz))
+
+def _cached_array(file_path, parse):
+    """
+    Returns the parsed contents of file_path, memory-mapped from the cache when it is valid.
+
+    The cache entry is named after the SHA-256 of the source file and CACHE_VERSION. The
+    hash itself is remembered together with the file size and modification time, so
+    unchanged files are not rehashed. A corrupt or truncated entry is parsed and written
+    again. Falls back to parsing when the cache directory is not writable.
+    """
+    try:
+        digest = _file_digest(file_path)
+        cache_path = os.path.join(CACHE_DIR, f'{os.path.basename(file_path)}.{digest[:16]}.v{CACHE_VERSION}.npy')
+        if os.path.exists(cache_path):
+            try:
+                return np.load(cache_path, mmap_mode='r')
+            except (ValueError, EOFError):
+                pass # unreadable entry, rewrite it below
+        array = np.ascontiguousarray(parse(file_path))
+        tmp_path = f'{cache_path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, array)
+        os.replace(tmp_path, cache_path) # atomic, so concurrent loaders never see a partial file
+        return np.load(cache_path, mmap_mode='r')
+    except OSError:
+        return parse(file_path)
+
+def _file_digest(file_path):
+    stat = os.stat(file_path)
+    index_path = os.path.join(CACHE_DIR, f'{os.path.basename(file_path)}.json')
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+        if index['path'] == os.path.abspath(file_path) and index['size'] == stat.st_size and index['mtime_ns'] == stat.st_mtime_ns:
+            return index['sha256']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha256.update(block)
+    digest = sha256.hexdigest()
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = f'{index_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({'path': os.path.abspath(file_path), 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}, f)
+    os.replace(tmp_path, index_path)
+    return digest
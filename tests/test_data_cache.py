@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from magprime.utility import data_loader
+
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_loader, 'CACHE_DIR', str(tmp_path / 'cache'))
+    path = tmp_path / 'data.txt'
+    path.write_text('1 2 3\n4 5 6\n')
+    return str(path)
+
+
+def _cache_file(tmp_path):
+    files = list((tmp_path / 'cache').glob('*.npy'))
+    assert len(files) == 1
+    return files[0]
+
+
+@pytest.mark.parametrize('corrupt', [b'', b'\x93NUMPY garbage', None])
+def test_corrupt_cache_entry_is_rewritten(source, tmp_path, corrupt):
+    expected = np.loadtxt(source)
+    np.testing.assert_array_equal(data_loader._cached_array(source, np.loadtxt), expected)
+    cache_file = _cache_file(tmp_path)
+    data = cache_file.read_bytes()
+    cache_file.write_bytes(data[:-8] if corrupt is None else corrupt)
+
+    np.testing.assert_array_equal(data_loader._cached_array(source, np.loadtxt), expected)
+    assert cache_file.read_bytes() == data
+
+
+def test_cache_key_includes_version(source, tmp_path, monkeypatch):
+    data_loader._cached_array(source, np.loadtxt)
+    monkeypatch.setattr(data_loader, 'CACHE_VERSION', data_loader.CACHE_VERSION + 1)
+    reparsed = data_loader._cached_array(source, lambda path: np.loadtxt(path) * 2)
+    np.testing.assert_array_equal(reparsed, 2 * np.loadtxt(source))
+    assert len(list((tmp_path / 'cache').glob('*.npy'))) == 2
@@ -0,0 +1,57 @@
+import numpy as np
+
+from magprime.algorithms.interference import ICA
+
+
+def _windows(n_windows, n_samples=5000, rank_deficient=False, seed=1):
+    "Three sensors x three axes: an ambient source per axis with equal coupling plus sensor-dependent interference"
+    rng = np.random.default_rng(seed)
+    gains = rng.uniform(0.5, 3, size=(3, 3, 2))
+    for k in range(n_windows):
+        ambient = 10 * np.stack([rng.laplace(size=n_samples),
+                                 rng.uniform(-1, 1, size=n_samples),
+                                 np.sign(rng.normal(size=n_samples)) * rng.exponential(size=n_samples)**2])
+        sources = np.stack([rng.uniform(-1, 1, size=n_samples), rng.laplace(size=n_samples),
+                            rng.uniform(-1, 1, size=n_samples)**3, rng.laplace(size=n_samples)**3,
+                            np.sign(rng.normal(size=n_samples)), rng.uniform(-1, 1, size=n_samples)])
+        if rank_deficient:
+            sources[1::2] = 0
+        G = gains * (1 + 0.01 * k)  # slowly drifting coupling
+        B = np.empty((3, 3, n_samples))
+        for sensor in range(3):
+            for axis in range(3):
+                B[sensor, axis] = ambient[axis] + G[sensor, axis] @ sources[2*axis:2*axis + 2]
+        yield B, ambient
+
+
+def _r2(a, b):
+    return np.corrcoef(a, b)[0, 1]**2
+
+
+def test_warm_start_converges_faster_with_same_recovery():
+    np.random.seed(0)
+    warm = ICA.WarmStartICA()
+    warm_iter, cold_iter = [], []
+    for k, (B, ambient) in enumerate(_windows(8)):
+        recovered = warm.cleanTriAxis(B)
+        cold = ICA.WarmStartICA()
+        recovered_cold = cold.cleanTriAxis(B)
+        if k < 2:
+            continue
+        warm_iter.append(warm.n_iter_[-1])
+        cold_iter.append(cold.n_iter_[-1])
+        for axis in range(3):
+            assert _r2(recovered[axis], ambient[axis]) > 0.99
+            assert _r2(recovered_cold[axis], ambient[axis]) > 0.99
+    assert max(warm_iter) < warm.triaxial_max_iter
+    assert sum(warm_iter) < sum(cold_iter)
+
+
+def test_rank_deficient_array_is_whitened_safely():
+    np.random.seed(0)
+    warm = ICA.WarmStartICA()
+    for B, ambient in _windows(4, rank_deficient=True):
+        recovered = warm.cleanTriAxis(B)
+        assert np.all(np.isfinite(recovered))
+        assert warm.whitening_.shape[0] == 6  # three ambient + three interference sources
+        assert warm.n_iter_[-1] < warm.triaxial_max_iter
@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+
+from magprime.algorithms.survey.PFSS import ssa_from_svd
+
+
+def _factors(C, rank=6, P=40, Q=30, seed=0):
+    rng = np.random.default_rng(seed)
+    K, Kh = (P + 1) // 2, (Q + 1) // 2
+    L, Lh = P - K + 1, Q - Kh + 1
+    return rng.normal(size=(C * K * Kh, rank)), rng.random(rank), rng.normal(size=(rank, L * Lh)), (P, Q)
+
+
+@pytest.mark.parametrize('C', [1, 3])
+def test_strided_out_is_filled(C):
+    U, s, Vt, shape = _factors(C)
+    expected = ssa_from_svd(U, s, Vt, shape)
+    buffer = np.zeros(expected.shape[:-1] + (2 * expected.shape[-1],))
+    out = buffer[..., ::2]
+    assert ssa_from_svd(U, s, Vt, shape, out=out) is out
+    np.testing.assert_array_equal(out, expected)
+
+
+def test_wrongly_shaped_out_is_rejected():
+    U, s, Vt, shape = _factors(1)
+    with pytest.raises(ValueError, match="expected"):
+        ssa_from_svd(U, s, Vt, shape, out=np.zeros((6, 40, 31)))
@@ -0,0 +1,23 @@
+import numpy as np
+import pytest
+
+from magprime.algorithms.survey.PFSS import pfss_tiled
+
+
+def _grid(shape, seed=0):
+    rng = np.random.default_rng(seed)
+    i, j = np.meshgrid(np.arange(shape[0]), np.arange(shape[1]), indexing='ij')
+    return np.sin(0.1 * i) * np.cos(0.07 * j) + 0.01 * rng.normal(size=shape)
+
+
+def test_thin_grid_is_not_split_along_its_short_axis():
+    X = _grid((20, 96))
+    X_low, X_sparse = pfss_tiled(X, tile_shape=(64, 64), overlap=32, r_max=3)
+    assert X_low.shape == X.shape
+    assert np.isfinite(X_low).all()
+    np.testing.assert_allclose(X_low + X_sparse, X)
+
+
+def test_overlap_must_be_smaller_than_split_tiles():
+    with pytest.raises(ValueError, match="overlap"):
+        pfss_tiled(_grid((100, 100)), tile_shape=(32, 32), overlap=32, r_max=3)
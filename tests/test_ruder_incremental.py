@@ -0,0 +1,39 @@
+import numpy as np
+
+from magprime.algorithms.anomaly.RUDER import RUDEREngine, _align_components
+
+
+def _series(seed, window_length=50, initialization_length=40, n_steps=300, n_anomalies=15):
+    rng = np.random.default_rng(seed)
+    n = window_length * (initialization_length + n_steps)
+    x = np.sin(2 * np.pi * np.arange(n) / 37.3) + 0.3 * rng.normal(size=n)
+    anomalous = rng.choice(np.arange(initialization_length + 10, initialization_length + n_steps), n_anomalies, replace=False)
+    for i in anomalous:
+        x[i * window_length:(i + 1) * window_length] += 3 * rng.normal(size=window_length)
+    return x
+
+
+def _window_flags(x, incremental, window_length=50, initialization_length=40):
+    engine = RUDEREngine(window_length, initialization_length, nu=0.05, detector='mahalanobis', incremental=incremental)
+    engine.initialize(x[:window_length * initialization_length])
+    flags = [engine.update(x[i * window_length:(i + 1) * window_length])[0]
+             for i in range(initialization_length, len(x) // window_length)]
+    return np.concatenate([flags, engine.pending()[::window_length]])
+
+
+def test_align_components_undoes_sign_flips_and_swaps():
+    rng = np.random.default_rng(0)
+    previous, _ = np.linalg.qr(rng.normal(size=(2, 20, 2)))
+    flipped = previous[..., ::-1] * np.array([-1.0, 1.0])
+    aligned, similarity = _align_components(flipped, previous)
+    np.testing.assert_allclose(aligned, previous, atol=1e-12)
+    np.testing.assert_allclose(similarity, 1.0)
+
+
+def test_incremental_flags_match_refit_flags():
+    for seed in (0, 1, 2):
+        x = _series(seed)
+        incremental = _window_flags(x, incremental=True)
+        refit = _window_flags(x, incremental=False)
+        assert np.mean((incremental > 0) == (refit > 0)) > 0.97
+        assert abs(incremental.mean() - refit.mean()) < 0.1 * refit.mean()
@@ -0,0 +1,28 @@
+import numpy as np
+
+from magprime.algorithms.anomaly.RUDER import _TrajectoryMatrix
+
+
+def _shift_rows(x, new_point):
+    "Reference update_single_point on a plain array: rows move up, the last row is the first row shifted by one"
+    shifted = np.copy(x)
+    shifted[:-1] = x[1:]
+    shifted[-1, :-1] = x[0, 1:]
+    shifted[-1, -1] = new_point
+    return shifted
+
+
+def test_update_single_point_on_ring_buffer():
+    rng = np.random.default_rng(0)
+    traj = _TrajectoryMatrix()
+    traj.from_timeseries(rng.normal(size=40), window_length=8)
+    expected = traj.x
+    for k in range(12):
+        if k % 3 == 0:
+            new_row = rng.normal(size=8)
+            traj.update_row(new_row)
+            expected = np.vstack([expected[1:], new_row])
+        new_point = rng.normal()
+        traj.update_single_point(new_point)
+        expected = _shift_rows(expected, new_point)
+        np.testing.assert_array_equal(traj.x, expected)
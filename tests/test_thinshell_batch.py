@@ -0,0 +1,54 @@
+import warnings
+
+import numpy as np
+import pytest
+
+from magprime.calibration import StreamingThinShell, thinshell, thinshell_batch
+
+
+def _passes(n_cal=4, n_samples=2000, noise=1.0, seed=1):
+    "Calibration passes through a 40 uT field with 1 nT sensor noise, one offset and misalignment per pass"
+    rng = np.random.default_rng(seed)
+    B = np.empty((n_cal, 3, n_samples))
+    ref_B = 40000 + 200 * np.sin(np.linspace(0, 2 * np.pi, n_samples)) * np.ones((n_cal, 1))
+    offsets = rng.normal(scale=50, size=(n_cal, 3))
+    for k in range(n_cal):
+        u = rng.normal(size=(3, n_samples))
+        u /= np.linalg.norm(u, axis=0)
+        A = np.triu(np.eye(3) + rng.normal(scale=0.01, size=(3, 3)))
+        B[k] = np.linalg.solve(A, ref_B[k] * u) + offsets[k, :, None] + rng.normal(scale=noise, size=(3, n_samples))
+    return B, ref_B, offsets
+
+
+def test_batch_matches_thinshell_on_noisy_data():
+    B, ref_B, offsets = _passes()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        batch = thinshell_batch(B[:, 0], B[:, 1], B[:, 2], ref_B)
+    assert batch["converged"].all()
+    assert (batch["n_iter"] < 100).all()
+    for k in range(len(B)):
+        single = thinshell(B[k, 0], B[k, 1], B[k, 2], ref_B[k])
+        np.testing.assert_allclose(batch["O"][k], single["O"], atol=1e-4)
+        np.testing.assert_allclose(batch["A"][k], single["A"], atol=1e-8)
+    np.testing.assert_allclose(batch["O"], offsets, atol=0.5)
+
+
+def test_batch_warns_when_max_iter_is_reached():
+    B, ref_B, _ = _passes(n_cal=2)
+    with pytest.warns(RuntimeWarning, match="did not converge"):
+        batch = thinshell_batch(B[:, 0], B[:, 1], B[:, 2], ref_B, max_iter=1)
+    assert not batch["converged"].any()
+    np.testing.assert_array_equal(batch["n_iter"], 1)
+
+
+def test_streaming_refinements_stop_once_converged():
+    B, ref_B, offsets = _passes(n_cal=1, n_samples=50000)
+    stream = StreamingThinShell()
+    refined = []
+    for i in range(0, B.shape[-1], 100):
+        result = stream.update(B[0, 0, i:i + 100], B[0, 1, i:i + 100], B[0, 2, i:i + 100], ref_B[0, i:i + 100])
+        refined.append(result["refined"])
+    assert any(refined[:50])
+    assert not any(refined[len(refined) // 2:])
+    np.testing.assert_allclose(result["O"], offsets[0], atol=0.2)